@@ -3,55 +3,35 @@ import xml.etree.ElementTree as ET
 
 import pygame
 
-import globs
 import settings
-import data
+import ui_assets
 
 class Box(pygame.Surface):
    """
    Class to provide sized boxes from a tileset.
    """
    
-   def __init__(self, size, fn=None):
+   def __init__(self, size, fn=None, rle=True):
       """
       Initialize a surface and draw the box onto it.
 
       size - the size of the box.
       fn - the path to a box xml config file.
+      rle - whether the transparency may be run length encoded, which makes blitting the box faster
+            but drawing onto it slower, so boxes which are drawn onto every frame shouldn't be.
       """
 
       #initialize the pygame Surface
       pygame.Surface.__init__(self, size)
 
-      #if no filename given, use the game default box
-      if fn == None:
-         fn = os.path.join(settings.path, "data", globs.DIALOG)
-
-      #parse the box xml file
-      root = data.getTreeRoot(fn)
-      tilesetPath = os.path.join(settings.path, "data", data.getAttr(root, "file", data.D_STRING))
-      tileset = data.getImage(tilesetPath)
-      transparency = data.getAttr(root, "transparency", data.D_INT3LIST)
-      tileset.set_colorkey(transparency)
-      tileSize = data.getAttr(root, "tilesize", data.D_INT2LIST)
-      data.check((tileSize[0]+1)*3==tileset.get_width()+1, tilesetPath)
-      data.check((tileSize[1]+1)*3==tileset.get_height()+1, tilesetPath)
+      #get the tiles, shared between all boxes using the same config file
+      tiles = ui_assets.UIAssets().getBoxTiles(fn)
+      tileSize = tiles.tileSize
 
       #fill transparent
       self.fill((255,0,255))
       self.set_colorkey((255,0,255))
 
-      #cut each of the nine tiles out from the tileset
-      tileNW = tileset.subsurface((0,0), tileSize)
-      tileN = tileset.subsurface((tileSize[0]+1,0), tileSize)
-      tileNE = tileset.subsurface(((tileSize[0]+1)*2,0), tileSize)
-      tileW = tileset.subsurface((0,tileSize[1]+1), tileSize)
-      tileC = tileset.subsurface((tileSize[0]+1,tileSize[1]+1), tileSize)
-      tileE = tileset.subsurface(((tileSize[0]+1)*2,tileSize[1]+1), tileSize)
-      tileSW = tileset.subsurface((0,(tileSize[1]+1)*2), tileSize)
-      tileS = tileset.subsurface((tileSize[0]+1,(tileSize[1]+1)*2), tileSize)
-      tileSE = tileset.subsurface(((tileSize[0]+1)*2,(tileSize[1]+1)*2), tileSize)
-
       #calculate how much of the box is not covered by edge tiles - all this middle must be covered by the centre tile
       #work out how many tiles it will take to cover that, and where to start drawing from
       middleSize = size[0]-(2*tileSize[0]), size[1]-(2*tileSize[1])
@@ -63,16 +43,20 @@ class Box(pygame.Surface):
       #after we finish each column, draw the top and bottom tiles on the edge
       for x in range(0, dimensions[0]):
          for y in range(0, dimensions[1]):
-            self.blit(tileC, (origin[0]+(x*tileSize[0]), origin[1]+(y*tileSize[1])))
+            self.blit(tiles.c, (origin[0]+(x*tileSize[0]), origin[1]+(y*tileSize[1])))
             if x == 0:
-               self.blit(tileW, (0, origin[1]+(y*tileSize[1])))
-               self.blit(tileE, (size[0]-tileSize[0], origin[1]+(y*tileSize[1])))
-         self.blit(tileN, (origin[0]+(x*tileSize[0]), 0))
-         self.blit(tileS, (origin[0]+(x*tileSize[0]), size[1]-tileSize[1]))
+               self.blit(tiles.w, (0, origin[1]+(y*tileSize[1])))
+               self.blit(tiles.e, (size[0]-tileSize[0], origin[1]+(y*tileSize[1])))
+         self.blit(tiles.n, (origin[0]+(x*tileSize[0]), 0))
+         self.blit(tiles.s, (origin[0]+(x*tileSize[0]), size[1]-tileSize[1]))
 
       #draw the corner tiles in the corners
-      self.blit(tileNW, (0, 0))
-      self.blit(tileNE, (size[0]-tileSize[0], 0))
-      self.blit(tileSW, (0, size[1]-tileSize[1]))
-      self.blit(tileSE, (size[0]-tileSize[0], size[1]-tileSize[1]))
+      self.blit(tiles.nw, (0, 0))
+      self.blit(tiles.ne, (size[0]-tileSize[0], 0))
+      self.blit(tiles.sw, (0, size[1]-tileSize[1]))
+      self.blit(tiles.se, (size[0]-tileSize[0], size[1]-tileSize[1]))
+
+      #now the box is drawn, run length encode the transparency if asked for
+      if rle and settings.rleAccel:
+         self.set_colorkey((255,0,255), pygame.RLEACCEL)
       
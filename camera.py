@@ -5,6 +5,139 @@ import pygame
 import sprite
 import globs
 
+#size of the pre-rendered map chunks, in tiles
+CHUNKSIZE = 16
+
+class ChunkCache():
+   """
+   Class holding pre-rendered chunks of a map's static tiles.
+
+   Each level of the map is cut into square chunks of tiles, which are rendered onto a surface the first time they're needed.
+   Any cell with an auto or walkonto animated tile on a level is left out of that level's chunks,
+   and is instead listed with the chunk so it can be drawn tile by tile each frame.
+   """
+
+   def __init__(self, mMap):
+      """
+      Find the animated cells on each level of a map, ready to render chunks.
+
+      mMap - the map to render.
+      """
+
+      #store the map for later
+      self.map = mMap
+
+      #find which layers are on each level, and which cells on each level have an animated tile in any layer
+      animatedTiles = mMap.tileset.autoAnimations.keys() + mMap.tileset.walkontoAnimations.keys()
+      self.layersOnLevel = {}
+      self.animatedCells = {}
+      for level in range(0, 3):
+         self.layersOnLevel[level] = mMap.getLayersOnLevel(level)
+         cells = set()
+         for layer in self.layersOnLevel[level]:
+            cells.update(layer.findTiles(animatedTiles))
+         self.animatedCells[level] = cells
+
+      #initialise the chunk dictionary
+      #chunks are stored as {(level, chunk x, chunk y): (surface, animated cells)}
+      self.chunks = {}
+
+      #no border surface yet
+      self.borderSurface = None
+      self.borderSize = None
+
+   def getChunk(self, level, chunkX, chunkY):
+      """
+      Get a chunk, rendering it if it hasn't been rendered yet.
+
+      Returns a tuple of the chunk surface and a list of the animated cells in the chunk.
+
+      level - the level of the chunk.
+      chunkX, chunkY - the chunk coordinates.
+      """
+
+      #if we don't have the chunk yet, render it
+      key = (level, chunkX, chunkY)
+      if not self.chunks.has_key(key):
+         self.chunks[key] = self.renderChunk(level, chunkX, chunkY)
+      return self.chunks[key]
+
+   def renderChunk(self, level, chunkX, chunkY):
+      """
+      Render the static tiles of a chunk onto a surface.
+
+      level - the level of the chunk.
+      chunkX, chunkY - the chunk coordinates.
+      """
+
+      #work out which map cells the chunk covers, chunks at the edges of the map may be smaller
+      origin = chunkX*CHUNKSIZE, chunkY*CHUNKSIZE
+      size = min(CHUNKSIZE, self.map.size[0]-origin[0]), min(CHUNKSIZE, self.map.size[1]-origin[1])
+
+      #create the surface, filled transparent
+      #the tileset's transparent colour is keyed out of every tile, so no tile can draw it onto the chunk
+      #the colour key isn't run length encoded yet, as that would make drawing the tiles onto it slow
+      key = self.map.tileset.transparency
+      surface = pygame.Surface((size[0]*globs.TILESIZE[0], size[1]*globs.TILESIZE[1]))
+      surface.fill(key)
+      surface.set_colorkey(key)
+
+      #go through each layer on the level in order, drawing in any static tiles
+      #take each layer's tiles for the chunk as a single region rather than tile by tile
+      animatedCells = self.animatedCells[level]
+      tiles = self.map.tileset.tiles
+      for layer in self.layersOnLevel[level]:
+         region = layer.getRegion(origin, size)
+         i = 0
+         for y in range(0, size[1]):
+            for x in range(0, size[0]):
+               t = region[i]
+               i += 1
+               if t >= 0 and not (origin[0]+x, origin[1]+y) in animatedCells:
+                  surface.blit(tiles[t], (x*globs.TILESIZE[0], y*globs.TILESIZE[1]))
+
+      #now the chunk is drawn, run length encode the transparency if asked for
+      if settings.rleAccel:
+         surface.set_colorkey(key, pygame.RLEACCEL)
+
+      #list the animated cells in the chunk
+      animated = [(x, y) for (x, y) in animatedCells
+                  if (origin[0] <= x < origin[0]+size[0]) and (origin[1] <= y < origin[1]+size[1])]
+
+      return surface, animated
+
+   def getMemorySize(self):
+      """Return the approximate number of bytes used by the pre-rendered surfaces."""
+
+      surfaces = [surface for surface, animatedCells in self.chunks.values()]
+      if self.borderSurface is not None:
+         surfaces.append(self.borderSurface)
+      return sum([s.get_width()*s.get_height()*s.get_bytesize() for s in surfaces])
+
+   def getBorderSurface(self, size):
+      """
+      Get a surface covered in the map's border tiles, aligned so its top left tile is at an even map position.
+
+      size - the size of the surface in tiles, which should be even.
+      """
+
+      #if we already have one the right size, and the border isn't animated, reuse it
+      borderIndexes = self.map.borderTiles.values()
+      animated = [i for i in borderIndexes if self.map.tileset.autoAnimations.has_key(i)]
+      if self.borderSurface is not None and self.borderSize == size and not animated:
+         return self.borderSurface
+
+      #draw each border tile in
+      surface = pygame.Surface((size[0]*globs.TILESIZE[0], size[1]*globs.TILESIZE[1]))
+      for x in range(0, size[0]):
+         for y in range(0, size[1]):
+            surface.blit(self.map.tileset[self.map.getBorderTile((x, y))], (x*globs.TILESIZE[0], y*globs.TILESIZE[1]))
+
+      #store it for reuse
+      self.borderSurface = surface
+      self.borderSize = size
+      return surface
+
 class Camera():
    """Class to draw the world onto the screen"""
    
@@ -20,6 +153,9 @@ class Camera():
       self.size = settings.screenSize
       self.centre = ((self.size[0]+1)/2)-1,((self.size[1]+1)/2)-1
 
+      #nothing drawn yet
+      self.lastState = None
+
    def setPosition(self, mMap, position):
       """
       Place the camera in a static position.
@@ -48,8 +184,15 @@ class Camera():
       #set the object we're attached to
       self.attach = mObject
 
-   def drawFrame(self):
-      """Draw a frame to the screen"""
+   def drawFrame(self, force=False):
+      """
+      Draw a frame to the screen.
+
+      In dirty rect mode, the frame is skipped if nothing the camera shows has changed since the last one.
+      Returns a list of the rects changed, which is empty if the frame was skipped.
+
+      force - if True, always draw the frame.
+      """
 
       #find the map, position and offset to use
       #if we're attached, use the map, position and offset of the object
@@ -63,58 +206,65 @@ class Camera():
          position = self.position
          cameraOffset = (0,0)
 
+      #find the maps to draw, with the map position of their top left corner
+      #the main map is at the origin, and connected maps are placed around it by their offset
+      maps = [(mMap, (0,0))]
+      for direction, (con, offset) in mMap.connectedMaps.items():
+         if direction == sprite.DIR_LEFT:
+            maps.append((con, (-con.size[0], offset)))
+         elif direction == sprite.DIR_RIGHT:
+            maps.append((con, (mMap.size[0], offset)))
+         elif direction == sprite.DIR_UP:
+            maps.append((con, (offset, -con.size[1])))
+         elif direction == sprite.DIR_DOWN:
+            maps.append((con, (offset, mMap.size[1])))
+
+      #in dirty rect mode, if everything we'd draw is the same as last frame, there's nothing to do
+      if settings.dirtyRects:
+         state = self.getFrameState(maps, position, cameraOffset)
+         if state == self.lastState and not force:
+            return []
+         self.lastState = state
+
+      #find the map position of the top left tile drawn
+      #we draw 1 tile either side of the screen for when the object is moving halfway between tiles
+      topLeft = position[0]-self.centre[0]-1, position[1]-self.centre[1]-1
+
+      #draw in the border tiles first, so any position without a tile on level 0 shows the border
+      #the border pattern repeats every 2 tiles, so start it from an even position
+      cache = self.getChunkCache(mMap)
+      borderOrigin = topLeft[0]-(topLeft[0]%2), topLeft[1]-(topLeft[1]%2)
+      border = cache.getBorderSurface((self.size[0]+4, self.size[1]+4))
+      self.screen.blit(border, self.mapToScreen(borderOrigin, position, cameraOffset))
+
       #draw in all the tiles
-      #iterate over each level, going over each coordinate and drawing in the required tiles
-      #only draw the border tiles in once, on the first pass
-      bordersDrawn = False
+      #iterate over each level, drawing each map's pre-rendered chunks which are on the screen
+      #then draw in any animated cells one tile at a time
       for level in range(0, 3):
-            for x in range(-1, self.size[0]+1): #1 tile either side for when the object is moving halfway between tiles
-               for y in range(-1, self.size[1]+1):
-
-                  #convert the screen coordinates x, y into map coordinates
-                  #if it's on the map, go through the map layers on the current level
-                  #if they specify a tile in the current position, add it to our list of tiles to draw
-                  reqTileLoc = position[0]-self.centre[0]+x, position[1]-self.centre[1]+y
-                  reqTiles = []
-                  if (reqTileLoc[0] >= 0) and (reqTileLoc[1] >= 0) and (reqTileLoc[0] < mMap.size[0]) and (reqTileLoc[1] < mMap.size[1]):
-                     for layer in mMap.getLayersOnLevel(level):
-                        i = layer[reqTileLoc]
-                        if i >= 0: #if no tile is specified, this should be -1
-                           reqTiles.append(mMap.tileset[i])
-
-                  #otherwise start checking connected maps
-                  #for each map, work out what the map coordinate would be on the map
-                  #if it would be on that map, go through the layers on the current level
-                  #if they specify a tile in the current position, add it to our list of tiles to draw
-                  #if we did find one, stop looking for any more                  
-                  else:
-                     for direction, (con, offset) in mMap.connectedMaps.items():
-                        if direction == sprite.DIR_LEFT: 
-                           rel = reqTileLoc[0]+con.size[0], reqTileLoc[1]-offset
-                        elif direction == sprite.DIR_RIGHT:
-                           rel = reqTileLoc[0]-mMap.size[0], reqTileLoc[1]-offset
-                        elif direction == sprite.DIR_UP:
-                           rel = reqTileLoc[0]-offset, reqTileLoc[1]+con.size[1]
-                        elif direction == sprite.DIR_DOWN:
-                           rel = reqTileLoc[0]-offset, reqTileLoc[1]-mMap.size[1]
-                        if (0 <= rel[0] < con.size[0]) and (0 <= rel[1] < con.size[1]):
-                           for layer in con.getLayersOnLevel(level):
-                              i = layer[rel]
-                              if i >= 0:
-                                 reqTiles.append(con.tileset[i])
-                           break
+            for m, mapOrigin in maps:
+               cache = self.getChunkCache(m)
 
-                  #if we've still not found a tile yet for this position, and borders haven't been drawn in yet,
-                  #then get the border tile for the current position.
-                  if (len(reqTiles) == 0) and not bordersDrawn:
-                     reqTiles.append(mMap.tileset[mMap.getBorderTile(reqTileLoc)])
+               #find the range of the map's positions on screen, and so the chunks to draw
+               low = max(topLeft[0]-mapOrigin[0], 0), max(topLeft[1]-mapOrigin[1], 0)
+               high = (min(topLeft[0]-mapOrigin[0]+self.size[0]+1, m.size[0]-1),
+                       min(topLeft[1]-mapOrigin[1]+self.size[1]+1, m.size[1]-1))
+               if low[0] > high[0] or low[1] > high[1]:
+                  continue
 
-                  #blit the required tiles to the correct position
-                  for t in reqTiles:
-                     self.screen.blit(t, ((x*globs.TILESIZE[0])-cameraOffset[0], (y*globs.TILESIZE[1])-cameraOffset[1]))
+               for chunkX in range(low[0]/CHUNKSIZE, (high[0]/CHUNKSIZE)+1):
+                  for chunkY in range(low[1]/CHUNKSIZE, (high[1]/CHUNKSIZE)+1):
+                     surface, animated = cache.getChunk(level, chunkX, chunkY)
+                     chunkOrigin = mapOrigin[0]+(chunkX*CHUNKSIZE), mapOrigin[1]+(chunkY*CHUNKSIZE)
+                     self.screen.blit(surface, self.mapToScreen(chunkOrigin, position, cameraOffset))
 
-            #having finished the first pass, any borders needed shold have been drawn by now
-            bordersDrawn = True
+                     #draw each animated cell on screen, going through each layer on the level in order
+                     for cell in animated:
+                        if (low[0] <= cell[0] <= high[0]) and (low[1] <= cell[1] <= high[1]):
+                           screenLoc = self.mapToScreen((mapOrigin[0]+cell[0], mapOrigin[1]+cell[1]), position, cameraOffset)
+                           for layer in cache.layersOnLevel[level]:
+                              i = layer[cell]
+                              if i >= 0:
+                                 self.screen.blit(m.tileset[i], screenLoc)
 
             #draw the map's sprites
             #filtering them by level gives the ids, so use this to build a list of sprites
@@ -150,3 +300,51 @@ class Camera():
                      spriteOffset = s.getOffset()
                      self.screen.blit(s.getTile(), ((reqLoc[0]*globs.TILESIZE[0])+spriteOffset[0]-cameraOffset[0],
                                                     (reqLoc[1]*globs.TILESIZE[1])+spriteOffset[1]-cameraOffset[1]))
+
+      #the whole screen has been drawn
+      return [self.screen.get_rect()]
+
+   def getChunkCache(self, mMap):
+      """
+      Get the chunk cache for a map, creating it if it's not been drawn before.
+
+      mMap - the map.
+      """
+
+      #the cache is stored on the map, so it goes when the map does
+      if mMap.chunkCache is None:
+         mMap.chunkCache = ChunkCache(mMap)
+      return mMap.chunkCache
+
+   def mapToScreen(self, mapPosition, position, cameraOffset):
+      """
+      Convert a map position into the screen coordinates to draw it at.
+
+      mapPosition - the map position to convert, relative to the main map.
+      position - the map position the camera is centred on.
+      cameraOffset - the offset of the camera due to movement.
+      """
+
+      return (((mapPosition[0]-position[0]+self.centre[0])*globs.TILESIZE[0])-cameraOffset[0],
+              ((mapPosition[1]-position[1]+self.centre[1])*globs.TILESIZE[1])-cameraOffset[1])
+
+   def getFrameState(self, maps, position, cameraOffset):
+      """
+      Return a value describing everything the camera would draw, to compare against the last frame.
+
+      maps - the list of (map, origin) being drawn.
+      position - the map position the camera is centred on.
+      cameraOffset - the offset of the camera due to movement.
+      """
+
+      #include the position, and for each map its animation frames and the state of its sprites
+      state = [position, cameraOffset]
+      for m, mapOrigin in maps:
+         state.append((m, mapOrigin))
+         state.append(tuple([a.getFrame() for a in m.tileset.autoAnimations.values()]))
+         for layer in m.layers:
+            state.append(tuple([(key, a.getFrame()) for key, a in layer.animations.items()]))
+         for s in m.sprites.values():
+            if s.visible:
+               state.append((s.position, s.level, s.getOffset(), s.getTile()))
+      return state
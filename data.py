@@ -1,10 +1,13 @@
 import os
+import collections
+import threading
 import xml.etree.ElementTree as ET
 
 import pygame
 
 import error
 import globs
+import settings
 
 D_STRING = 0
 D_INT = 1
@@ -12,6 +15,9 @@ D_INTLIST = 2
 D_INT2LIST = 3
 D_INT3LIST = 4
 
+#approximate number of bytes of XML source to keep parsed in memory
+TREECACHE_BUDGET = 4*1024*1024
+
 class DMissingAttributeError(error.DittoError):
    def __init__(self, node, attr):
       self.fn = node.ditto_fn
@@ -45,24 +51,165 @@ class DMissingNodeError(error.DittoError):
               "On node <%s> in file %s:" % (self.parentName, os.path.split(self.fn)[1]),
               "Unable to find child node <%s>" % self.childName]
 
+class ResourceCache():
+   """
+   Least recently used cache of loaded resources, bounded by an approximate byte budget.
+
+   Each entry is stored with a size, used to keep the total under budget,
+   and a stamp, used to check the entry is still valid when it's requested.
+   Safe to use from more than one thread.
+   """
+
+   def __init__(self, budget=None, onEvict=None):
+      """
+      Create an empty cache.
+
+      budget - the maximum total size of entries to hold, or None for no limit.
+      onEvict - function to call with (key, value) when an entry is evicted to make room.
+      """
+
+      #store the settings
+      self.budget = budget
+      self.onEvict = onEvict
+
+      #create the entry dictionary, ordered from least to most recently used
+      #entries are stored as {key: (value, size, stamp)}
+      self.entries = collections.OrderedDict()
+      self.used = 0
+      self.lock = threading.RLock()
+
+      #initialise counters
+      self.hits = 0
+      self.misses = 0
+      self.evictions = 0
+
+   def get(self, key, stamp=None):
+      """
+      Get an entry from the cache, or None if it isn't there or is out of date.
+
+      key - the key of the entry.
+      stamp - if not None, the entry is only returned if it was stored with the same stamp.
+      """
+
+      with self.lock:
+         #try to find the entry, counting a miss if it's not there
+         try:
+            value, size, entryStamp = self.entries.pop(key)
+         except KeyError:
+            self.misses += 1
+            return None
+
+         #if the entry is out of date, leave it removed and count a miss
+         if stamp is not None and entryStamp != stamp:
+            self.used -= size
+            self.misses += 1
+            return None
+
+         #put the entry back as the most recently used and count a hit
+         self.entries[key] = (value, size, entryStamp)
+         self.hits += 1
+         return value
+
+   def put(self, key, value, size=0, stamp=None):
+      """
+      Store an entry in the cache, evicting the least recently used entries if over budget.
+
+      key - the key of the entry.
+      value - the value to store.
+      size - the approximate size of the entry, in bytes.
+      stamp - a value to check the entry against when it's requested.
+      """
+
+      with self.lock:
+         #replace any existing entry
+         self.remove(key)
+         self.entries[key] = (value, size, stamp)
+         self.used += size
+
+         #evict from the least recently used end until under budget
+         #never evict the entry we've just stored
+         if self.budget is not None:
+            while self.used > self.budget and len(self.entries) > 1:
+               oldKey, (oldValue, oldSize, oldStamp) = self.entries.popitem(last=False)
+               self.used -= oldSize
+               self.evictions += 1
+               if self.onEvict is not None:
+                  self.onEvict(oldKey, oldValue)
+
+   def remove(self, key):
+      """
+      Remove an entry from the cache if it's there, and return its value.
+
+      key - the key of the entry.
+      """
+
+      with self.lock:
+         #remove the entry, returning None if it wasn't there
+         try:
+            value, size, stamp = self.entries.pop(key)
+         except KeyError:
+            return None
+         self.used -= size
+         return value
+
+   def clear(self):
+      """Remove all entries from the cache."""
+
+      with self.lock:
+         self.entries.clear()
+         self.used = 0
+
+   def getStats(self):
+      """Return a dictionary of cache statistics."""
+
+      return {"entries": len(self.entries),
+              "used": self.used,
+              "budget": self.budget,
+              "hits": self.hits,
+              "misses": self.misses,
+              "evictions": self.evictions}
+
+#cache of parsed XML roots, keyed by absolute path
+treeCache = ResourceCache(TREECACHE_BUDGET)
+
 def getTreeRoot(path, fn="Unknown file"):
    """
    Use a filename to create an XML tree and return the root node.
 
+   Parsed trees are cached and shared between callers, so must not be modified.
+   A cached tree is reparsed if the file has changed since it was cached.
+
    path - the path to the XML file.
    fn - the file from which the XML file was requested.
    """
 
+   #find the file's modification time and size to check the cached tree is still valid
+   #if we can't, raise the relevant exception
+   key = os.path.abspath(path)
+   try:
+      st = os.stat(key)
+   except OSError:
+      raise error.DIOError(fn, path)
+   stamp = (st.st_mtime, st.st_size)
+
+   #if there's a valid cached tree, use that
+   root = treeCache.get(key, stamp)
+   if root is not None:
+      return root
+
    #try to open it
    #if there's an IO error, raise the relevant exception.
    try:
       tree = ET.parse(path)
    except IOError:
-      raise error.DIOException(fn, path)
+      raise error.DIOError(fn, path)
    root = tree.getroot()
 
    #set the filename
    root.ditto_fn = path
+
+   #cache it, using the file size as an estimate of its memory cost
+   treeCache.put(key, root, st.st_size, stamp)
    
    return root
 
@@ -241,6 +388,34 @@ def getImage(imagePath, fn="Unknown file"):
    except:
       raise error.DInvalidResourceError(fn, imagePath)
 
+def toDisplayFormat(surface, transparency=None):
+   """
+   Convert a surface to the display's pixel format, so blitting it needs no conversion.
+
+   Must be called after the display mode is set for the conversion to happen.
+   Before then (eg. when loading headless) the surface is left in its own format.
+   Converting a subsurface gives an independent surface.
+
+   surface - the surface to convert.
+   transparency - the colour to make transparent, if any.
+   """
+
+   #convert if there's a display to convert to, keeping per pixel alpha if the image has it
+   if pygame.display.get_surface() is not None:
+      if (transparency is None) and (surface.get_flags() & pygame.SRCALPHA):
+         surface = surface.convert_alpha()
+      else:
+         surface = surface.convert()
+
+   #set the transparency, run length encoded if asked for
+   if transparency is not None:
+      if settings.rleAccel:
+         surface.set_colorkey(transparency, pygame.RLEACCEL)
+      else:
+         surface.set_colorkey(transparency)
+
+   return surface
+
 def check(exp, resourcePath, fn="Unknown file"):
    """
    Perform a boolean check to make sure a resource is suitable.
@@ -29,8 +29,10 @@ class debugCamera(Camera):
       self.warpTile.fill((0,0,255))
       self.warpTile.set_alpha(127)
 
-   def drawFrame(self):
-      Camera.drawFrame(self)
+   def drawFrame(self, force=False):
+      rects = Camera.drawFrame(self, force)
+      if not rects: #nothing redrawn, so nothing to overlay
+         return rects
 
       if self.attach != None: #if attched to something
          mMap = self.attach.map #use the map of the attached object
@@ -53,4 +55,5 @@ class debugCamera(Camera):
                      self.screen.blit(self.walkontoTile, ((x*globs.TILESIZE[0])-cameraOffset[0], (y*globs.TILESIZE[1])-cameraOffset[1]))
                elif e.trigger == events.EV_INVESTIGATE:
                   self.screen.blit(self.investigateTile, ((x*globs.TILESIZE[0])-cameraOffset[0], (y*globs.TILESIZE[1])-cameraOffset[1]))
-      
+
+      return rects
@@ -5,10 +5,8 @@ import pygame
 
 import foreground_object
 import box
-import font
-import globs
+import ui_assets
 import settings
-import data
 import sound
 import game_input
 
@@ -49,56 +47,57 @@ class Dialog(foreground_object.ForegroundObject):
       elif settings.textSpeed == "FAST":
          self.speed = 4
 
-      #parse the dialog xml file
-      fn = os.path.join(settings.path, "data", globs.DIALOG)
-      root = data.getTreeRoot(fn, "Ditto main")
-      transparency = data.getAttr(root, "transparency", data.D_INT3LIST)
+      #get the font and cursors, shared with other dialogs
+      assets = ui_assets.UIAssets()
+      self.font = assets.getFont()
+      self.cursor, self.sideCursor = assets.getCursors()
 
-      #create font
-      fontPath = os.path.join(settings.path, "data", globs.FONT)
-      self.font = font.Font(fontPath)
-
-      #create the box
+      #create the box, which is the layer the text is written onto as it's revealed
+      #it's drawn onto every frame while writing, so its transparency isn't run length encoded
       size = ((self.screen.get_width()-(OBJECTBUFFER*2), (len(self.text)*(self.font.height+LINEBUFFER))-LINEBUFFER+(BORDER*2)))
-      self.box = box.Box(size).convert(self.screen)
+      self.box = box.Box(size, rle=False).convert(self.screen)
 
-      #load the cursors
-      cursorPath = os.path.join(settings.path, "data", data.getAttr(root, "cursor", data.D_STRING))
-      self.cursor = data.getImage(cursorPath).convert(self.screen)
-      self.cursor.set_colorkey(transparency)
+      #calculate location of the cursor
       self.cursorLocation = (self.screen.get_width()-OBJECTBUFFER-BORDER-self.cursor.get_width(),
                              self.screen.get_height()-OBJECTBUFFER-BORDER-self.cursor.get_height())
 
-      cursorPath = os.path.join(settings.path, "data", data.getAttr(root, "sidecursor", data.D_STRING))
-      self.sideCursor = data.getImage(cursorPath).convert(self.screen)
-      self.sideCursor.set_colorkey(transparency)
-
       #calculate location of dialog box
       self.location = OBJECTBUFFER, self.screen.get_height()-self.box.get_height()-OBJECTBUFFER
 
       #start progress at 0 and set drawing and busy
+      #we need drawing for the first time
       self.progress = 0
       self.writing = True
       self.busy = True
+      self.changed = True
+
+      #store the total length of the text
+      #and keep track of how many characters have been drawn onto the box, and where the next one goes
+      self.length = sum(map(len, self.text))
+      self.drawn = 0
+      self.drawLine = 0
+      self.drawChar = 0
+      self.drawX = BORDER
 
    def draw(self):
       """Draw the dialog onto its screen."""
 
-      #start a count of how many characters have been drawn
-      #for each line of text, work out where it will be drawn
-      #then work out how many characters on this line will be drawn
-      #finally draw the text required onto the box, and increase the character count                             
-      c = 0
-      for i in range(0, len(self.text)): #for count lines of text
-         line = self.text[i] #get the line
-         location = BORDER, BORDER+(i*(self.font.height+LINEBUFFER))
-         charsOnLine = self.progress - c
-         if charsOnLine < len(line):
-            cutText = line[:charsOnLine]
-         else:
-            cutText = line
-         self.font.writeText(cutText, self.box, location)
-         c += len(cutText)
+      #draw the characters revealed since the last frame onto the box
+      #the box is never cleared, so the characters already on it needn't be drawn again
+      #once writing's finished there are none, and the box is just blitted as it is
+      end = min(self.progress, self.length)
+      while self.drawn < end:
+         line = self.text[self.drawLine]
+         if self.drawChar >= len(line):
+            self.drawLine += 1
+            self.drawChar = 0
+            self.drawX = BORDER
+            continue
+         image = self.font.getCharacter(line[self.drawChar])
+         self.box.blit(image, (self.drawX, BORDER+(self.drawLine*(self.font.height+LINEBUFFER))))
+         self.drawX += image.get_width()
+         self.drawChar += 1
+         self.drawn += 1
 
       #draw the box
       self.screen.blit(self.box, self.location)
@@ -107,6 +106,16 @@ class Dialog(foreground_object.ForegroundObject):
       if not self.writing and self.drawCursor:
          self.screen.blit(self.cursor, self.cursorLocation)
 
+      #we're now up to date on screen
+      self.changed = False
+
+   def getDirtyRects(self):
+      """Return the rect of the dialog box if it has changed since it was last drawn."""
+
+      if self.changed:
+         return [pygame.Rect(self.location, self.box.get_size())]
+      return []
+
    def inputButton(self, button):
       """
       Process a button press
@@ -123,9 +132,13 @@ class Dialog(foreground_object.ForegroundObject):
    def tick(self):
       """Update the dialog one frame"""
 
+      #if we're still writing, there'll be new text to draw
+      if self.writing:
+         self.changed = True
+
       #increase the progress, and if we've reached the end the set drawing to False                      
       self.progress += self.speed
-      if self.progress > sum(map(len, self.text)):
+      if self.progress > self.length:
          self.writing = False
 
 class ChoiceDialog(Dialog):
@@ -147,7 +160,7 @@ class ChoiceDialog(Dialog):
       """
 
       #initialize the dialog
-      Dialog.__init__(self, text, font, screen, False) #initialize the main dialog
+      Dialog.__init__(self, text, screen, False) #initialize the main dialog
 
       #store variables we'll need again
       self.scriptEngine = scriptEngine
@@ -157,7 +170,7 @@ class ChoiceDialog(Dialog):
       maxWidth = max(map(self.font.calcWidth, self.choices))
       size = (maxWidth+(BORDER*2)+self.sideCursor.get_width(),
               ((self.font.height+LINEBUFFER)*len(self.choices))-LINEBUFFER+(BORDER*2))
-      self.choiceBox = box.Box(size).convert(self.screen)
+      self.choiceBox = box.Box(size, rle=False).convert(self.screen)
 
       for i in range(0, len(choices)):
          choice = choices[i]
@@ -184,6 +197,14 @@ class ChoiceDialog(Dialog):
                            self.choiceLocation[1]+BORDER+(self.current*(self.font.height+LINEBUFFER)))
          self.screen.blit(self.sideCursor, cursorLocation)
 
+   def getDirtyRects(self):
+      """Return the rects of the dialog box and choice box if they've changed since they were last drawn."""
+
+      if self.changed:
+         return [pygame.Rect(self.location, self.box.get_size()),
+                 pygame.Rect(self.choiceLocation, self.choiceBox.get_size())]
+      return []
+
    def inputButton(self, button):
       """
       Process a button press.
@@ -198,10 +219,12 @@ class ChoiceDialog(Dialog):
       if button == game_input.BT_DOWN:
          if self.current < len(self.choices)-1:
             self.current += 1
+            self.changed = True
             sound.playEffect(sound.SD_CHOOSE)
       elif button == game_input.BT_UP:
          if self.current > 0:
             self.current -= 1
+            self.changed = True
             sound.playEffect(sound.SD_CHOOSE)
 
       #if we're exiting, set the LASTRESULT script engine variable to the current selected choice      
@@ -13,6 +13,7 @@ import intro
 import game_input
 import sound
 import data
+import script_engine
 
 class Ditto():
    """Main entry class to create a Ditto game."""
@@ -88,8 +89,13 @@ class Ditto():
                done = False
 
          #draw the frame, and update the display
-         self.activeScene.drawFrame()
-         pygame.display.flip()
+         #in dirty rect mode, only update the changed parts of the display, if any
+         rects = self.activeScene.drawFrame()
+         if settings.dirtyRects and rects is not None:
+            if rects:
+               pygame.display.update(rects)
+         else:
+            pygame.display.flip()
          
          #wait for the next frame
          self.clock.tick(settings.framerate)
@@ -97,6 +103,10 @@ class Ditto():
    def clearup(self):
       "Exit the game."""
 
+      #write out the script profile, if profiling, and any compiled scripts not yet written
+      script_engine.ScriptEngine().writeProfile()
+      script_engine.flushCache()
+
       #quit pygame
       pygame.quit()
          
@@ -8,6 +8,15 @@ import data
 import globs
 import error
 
+#maximum approximate size in bytes of rendered text to keep cached
+TEXTCACHE_BUDGET = 2*1024*1024
+
+#maximum number of text widths each font remembers
+WIDTHMEMO_LIMIT = 256
+
+#cache of rendered text surfaces, shared by all fonts and keyed by (font path, text)
+textCache = data.ResourceCache(TEXTCACHE_BUDGET)
+
 class Font():
    """Class to load fonts and write with them."""
    
@@ -19,47 +28,94 @@ class Font():
       """
 
       #parse the XML file
+      #fonts from the same file render the same, so share cached text between them
       root = data.getTreeRoot(fn)
       path = os.path.join(settings.path, "data", data.getAttr(root, "file", data.D_STRING))
       self.height = data.getAttr(root, "height", data.D_INT)
-      transparency = data.getAttr(root, "transparency", data.D_INT3LIST)
+      self.transparency = data.getAttr(root, "transparency", data.D_INT3LIST)
+      self.key = os.path.abspath(fn)
 
       #load the image
-      image = data.getImage(path, fn)
-      image.set_colorkey(transparency)
+      image = data.toDisplayFormat(data.getImage(path, fn))
 
-      #cut out the tiles and store them in a dictionary
+      #cut out the characters and store them in a dictionary
+      #each is converted to its own surface, in the display format
       self.characters = {}
       for c in data.getChildren(root, "character"):
          char = data.getAttr(c, "char", data.D_STRING)
          width = data.getAttr(c, "width", data.D_INT)
          location = data.getAttr(c, "location", data.D_INT2LIST)
-         self.characters[char] = image.subsurface(location[0], location[1], width, self.height)
+         self.characters[char] = data.toDisplayFormat(image.subsurface(location[0], location[1], width, self.height), self.transparency)
+
+      #create the memo of text widths
+      self.widths = {}
 
-   def writeText(self, text, surface, location):
+   def writeText(self, text, surface, location, cache=True):
       """
       Write text to a given surface at a given location
 
       text - the string to write
       surface - the surface to write onto
       location - the coordinates on the surface to start drawing at
+      cache - whether to render the text once and cache it, rather than blitting each character
       """
 
+      #if the text is to be cached, it's just one blit
+      if cache:
+         if text:
+            surface.blit(self.render(text), location)
+         return
+
       #interpret the location as two separate variables
       pointerX, pointerY = location
 
       #for each character, make sure it exists
       #blit it to the current position, then advance the pointer
       for char in text:
-         try:
-            image = self.characters[char]
-         except KeyError:
-            raise error.DittoInvalidResourceException("Font file", "Character %s" % char)
+         image = self.getCharacter(char)
          surface.blit(image, (pointerX, pointerY))
          pointerX += image.get_width()
 
+   def render(self, text):
+      """
+      Get a surface with text written on it, rendering it if it isn't cached.
+
+      text - the string to render
+      """
+
+      #try the cache first
+      key = self.key, text
+      image = textCache.get(key)
+      if image is not None:
+         return image
+
+      #write the text onto a surface filled with the transparent colour, then make that colour transparent
+      image = pygame.Surface((self.calcWidth(text), self.height))
+      image.fill(self.transparency)
+      self.writeText(text, image, (0, 0), False)
+      image = data.toDisplayFormat(image, self.transparency)
+      textCache.put(key, image, image.get_width()*image.get_height()*image.get_bytesize())
+      return image
+
+   def getCharacter(self, char):
+      """Get the image of a character, raising an error if the font doesn't have it."""
+
+      try:
+         return self.characters[char]
+      except KeyError:
+         raise error.DInvalidResourceError("Font file", "Character %s" % char)
+
    def calcWidth(self, text):
       """Calculate how wide text would be if written in this font."""
 
-      #return the sum of the widths of the characters
-      return sum([self.characters[char].get_width() for char in text])    
+      #use the memo if we've seen the text before
+      #otherwise sum the widths of the characters, and remember it
+      try:
+         return self.widths[text]
+      except KeyError:
+         pass
+      width = sum([self.getCharacter(char).get_width() for char in text])
+      if len(self.widths) >= WIDTHMEMO_LIMIT:
+         self.widths.clear()
+      self.widths[text] = width
+      return width
@@ -28,6 +28,15 @@ class ForegroundObject():
       """Update the object"""
       pass
 
+   def getDirtyRects(self):
+      """
+      Return a list of the screen rects the object will change when next drawn.
+
+      Returns None if the object needs whatever is behind it redrawing first.
+      """
+      
+      return None
+
 class FadeOutAndIn(ForegroundObject):
    """
    Foreground object to provide a fade transition.
@@ -55,6 +64,11 @@ class FadeOutAndIn(ForegroundObject):
       self.count = 0
       self.busy = True
 
+   def getDirtyRects(self):
+      """The fade changes every frame, and needs the screen behind it redrawing."""
+
+      return None
+
    def draw(self):
       """Draw the fade onto the screen"""
 
@@ -61,6 +61,9 @@ class Game(scene.Scene):
       self.camera = camera.Camera(screen)
       self.camera.attachTo(self.player)
 
+      #no foreground object drawn yet
+      self.drawnForeground = None
+
    def giveInput(self, inputData):
       """
       Take the input data from the input manager and store it.
@@ -90,7 +93,7 @@ class Game(scene.Scene):
                self.paused = not self.paused
                self.foregroundObject = pause_menu.PauseMenu(self.screen, self, os.path.join(settings.path, "data", self.menuPath))
             elif key == game_input.BT_DEBUG:
-               pass
+               self.scriptEngine.writeProfile()
                
          for key in self.keysJustReleased:
             if key == game_input.BT_B:
@@ -127,13 +130,31 @@ class Game(scene.Scene):
       return done
 
    def drawFrame(self):
-      """Draw a frame to the screen."""
+      """
+      Draw a frame to the screen.
+
+      Returns a list of the rects changed.
+      """
+
+      #find out what the foreground object is going to change, if there is one
+      #if it needs the world redrawn behind it, or it's appeared or gone since the last frame, the camera has to redraw
+      fgRects = []
+      if self.foregroundObject is not None:
+         fgRects = self.foregroundObject.getDirtyRects()
+      force = (fgRects is None) or (self.foregroundObject is not self.drawnForeground)
+      self.drawnForeground = self.foregroundObject
 
       #tell the camera to draw a frame
       #then if there is a foreground object get that drawn on top
-      self.camera.drawFrame()
+      #if the camera didn't redraw, only draw the foreground object if it's changed
+      rects = self.camera.drawFrame(force)
       if self.foregroundObject is not None:
-         self.foregroundObject.draw()
+         if rects:
+            self.foregroundObject.draw()
+         elif fgRects:
+            self.foregroundObject.draw()
+            rects = fgRects
+      return rects
 
    def openSave(self, fn, root):
       """
@@ -0,0 +1,120 @@
+import sys, os
+import struct
+import marshal
+import array
+
+import settings
+import tilemap
+import data
+import error
+
+def bake(fn):
+   """
+   Bake a map XML file, its TMX file and its tileset offsets into one binary file.
+
+   The baked file is written next to the map XML file, and is used by Tilemap
+   in place of the XML as long as neither source file changes.
+
+   fn - the path to the map XML file.
+   """
+
+   #open the map from its XML
+   mapData = tilemap.MapData()
+   mapData.openXML(fn)
+
+   #gather everything that isn't tile data into the metadata
+   border = [mapData.borderTiles[tilemap.BD_NW],
+             mapData.borderTiles[tilemap.BD_NE],
+             mapData.borderTiles[tilemap.BD_SW],
+             mapData.borderTiles[tilemap.BD_SE]]
+   meta = {"mtimes": mapData.getSourceTimes(),
+           "music": mapData.music,
+           "file": mapData.mapFile,
+           "tileset": mapData.tilesetFile,
+           "size": mapData.size,
+           "border": border,
+           "connections": mapData.connections,
+           "levels": [l.level for l in mapData.layers],
+           "npcs": [tilemap.describeNode(n) for n in mapData.npcNodes],
+           "scripts": [tilemap.describeNode(n) for n in mapData.scriptNodes],
+           "warps": [tilemap.describeNode(n) for n in mapData.warpNodes]}
+   metaString = marshal.dumps(meta)
+
+   #flatten each layer into a plane, with the collision and behaviour planes last
+   #planes are always stored little endian
+   planes = []
+   for l in mapData.layers + [mapData.collisionLayer, mapData.behaviourLayer]:
+      plane = array.array("h", l.array)
+      if sys.byteorder == "big":
+         plane.byteswap()
+      planes.append(plane.tostring())
+
+   #write the header, metadata and planes
+   bakedPath = tilemap.getBakedPath(fn)
+   try:
+      f = open(bakedPath, "wb")
+      f.write(struct.pack(tilemap.BAKED_HEADER, tilemap.BAKED_MAGIC, tilemap.BAKED_VERSION, len(metaString)))
+      f.write(metaString)
+      for plane in planes:
+         f.write(plane)
+      f.close()
+   except IOError:
+      raise error.DIOError(fn, bakedPath)
+
+   return bakedPath
+
+def isMapFile(fn):
+   """
+   Find out whether an XML file is a map XML file.
+
+   fn - the path to the XML file.
+   """
+
+   #map files have a map data file and a border
+   try:
+      root = data.getTreeRoot(fn)
+   except Exception:
+      return False
+   return ("file" in root.attrib) and ("tileset" in root.attrib) and (root.find("border") is not None)
+
+def findMaps(path):
+   """
+   Find all the map XML files at a path.
+
+   path - a map XML file, or a directory to search.
+   """
+
+   #if it's a single file, just use that
+   if not os.path.isdir(path):
+      return [path]
+
+   #otherwise walk the directory looking for map files
+   maps = []
+   for dirpath, dirnames, filenames in os.walk(path):
+      for name in filenames:
+         fn = os.path.join(dirpath, name)
+         if os.path.splitext(name)[1] == ".xml" and isMapFile(fn):
+            maps.append(fn)
+   return maps
+
+def main(args):
+   """
+   Bake every map given on the command line.
+
+   Arguments are map XML files or directories to search for them.
+   With no arguments, the whole game data directory is searched.
+   """
+
+   #default to the game data directory
+   if not args:
+      args = [os.path.join(settings.path, "data")]
+
+   #bake each map, reporting as we go
+   for path in args:
+      for fn in findMaps(path):
+         bakedPath = bake(fn)
+         print "Baked %s -> %s" % (fn, bakedPath)
+
+#if we're being used as the entry point, bake the maps asked for
+if __name__ == "__main__":
+   main(sys.argv[1:])
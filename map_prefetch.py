@@ -0,0 +1,148 @@
+import os
+import threading
+import collections
+import Queue
+
+import settings
+import tilemap
+import sprite
+import data
+
+#how close, in tiles, the player must be to a connected edge before the maps beyond are prefetched
+PREFETCH_DISTANCE = 4
+
+#maximum number of prefetched maps to hold waiting to be used
+PREFETCH_LIMIT = 8
+
+class MapPrefetcher():
+   """
+   Class to load the data of maps the player is likely to need next on a worker thread.
+
+   The worker only does pure data loading - the map and TMX files, and the tileset XML files.
+   Anything creating pygame surfaces is left to the main thread when the Tilemap is built.
+
+   Borg singleton, so every instance shares the same worker and results.
+   """
+
+   #borg singleton
+   __shared_state = {"worker": None,
+                     "queue": Queue.Queue(),
+                     "lock": threading.Condition(),
+                     "pending": set(),
+                     "results": collections.OrderedDict(),
+                     "hits": 0,
+                     "misses": 0}
+
+   def __init__(self):
+      """Get the shared state."""
+
+      self.__dict__ = self.__shared_state
+
+   def predict(self, mMap, position, direction):
+      """
+      Prefetch the maps the player may need next, given where they're heading.
+
+      If the player is heading towards a connected edge and is close to it,
+      the maps connected to the map beyond it are prefetched.
+
+      mMap - the main map.
+      position - the position the player is moving to.
+      direction - the direction the player is moving in.
+      """
+
+      #find how far we are from the edge we're heading for
+      if direction == sprite.DIR_LEFT:
+         distance = position[0]
+      elif direction == sprite.DIR_RIGHT:
+         distance = mMap.size[0]-1-position[0]
+      elif direction == sprite.DIR_UP:
+         distance = position[1]
+      else:
+         distance = mMap.size[1]-1-position[1]
+
+      #if we're close to a connected edge, request the maps connected to the map beyond it
+      #the map we're on will already be loaded, so skip that
+      if (distance <= PREFETCH_DISTANCE) and mMap.connectedMaps.has_key(direction):
+         con = mMap.connectedMaps[direction][0]
+         for fn, offset in con.connections.values():
+            if os.path.abspath(fn) != os.path.abspath(mMap.fn):
+               self.request(fn)
+
+   def request(self, fn):
+      """
+      Ask for a map to be loaded on the worker thread, if it isn't already loaded or loading.
+
+      fn - the filename of the map XML file.
+      """
+
+      #do nothing if it's already loaded or loading
+      key = os.path.abspath(fn)
+      with self.lock:
+         if self.results.has_key(key) or key in self.pending:
+            return
+         self.pending.add(key)
+
+      #start the worker if it isn't running, and queue the map
+      if self.worker is None:
+         self.worker = threading.Thread(target=self.work)
+         self.worker.daemon = True
+         self.worker.start()
+      self.queue.put(fn)
+
+   def take(self, fn):
+      """
+      Take the prefetched data for a map, waiting for it if it's still loading.
+
+      Returns None if the map wasn't prefetched, or loading it failed,
+      in which case the caller should load it itself.
+
+      fn - the filename of the map XML file.
+      """
+
+      #wait for the map if it's loading, then take it if it's there
+      key = os.path.abspath(fn)
+      with self.lock:
+         while key in self.pending:
+            self.lock.wait()
+         mapData = self.results.pop(key, None)
+         if mapData is None:
+            self.misses += 1
+         else:
+            self.hits += 1
+         return mapData
+
+   def work(self):
+      """Load queued maps forever. Run on the worker thread."""
+
+      while True:
+         fn = self.queue.get()
+         key = os.path.abspath(fn)
+
+         #load the map data, and parse the tileset files it uses so they're cached
+         #if anything goes wrong, leave it for the main thread to load the map itself and report the error
+         try:
+            mapData = tilemap.MapData()
+            mapData.open(fn)
+            data.getTreeRoot(os.path.join(settings.path, "data", mapData.tilesetFile))
+            for n in mapData.npcNodes:
+               data.getTreeRoot(os.path.join(settings.path, "data", data.getAttr(n, "tileset", data.D_STRING)))
+         except Exception:
+            mapData = None
+
+         #store the result, dropping the oldest unused results if there are too many
+         with self.lock:
+            self.pending.discard(key)
+            if mapData is not None:
+               self.results[key] = mapData
+               while len(self.results) > PREFETCH_LIMIT:
+                  self.results.popitem(last=False)
+            self.lock.notifyAll()
+
+   def getStats(self):
+      """Return a dictionary of prefetch statistics."""
+
+      with self.lock:
+         return {"waiting": len(self.results),
+                 "pending": len(self.pending),
+                 "hits": self.hits,
+                 "misses": self.misses}
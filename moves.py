@@ -1,25 +1,68 @@
 import globs
 import xml.etree.ElementTree as ET
 import os
+import collections
 import data
 import error
 import settings
 
+#compact record of a move's data
+MoveData = collections.namedtuple("MoveData", ["id", "name", "pp"])
+
+class MoveDB():
+   """
+   Index of move data, loaded once from the moves XML file.
+
+   Borg singleton, so every instance shares the same index.
+   """
+
+   #borg singleton
+   __shared_state = {"fn": None, "moves": {}}
+   
+   def __init__(self):
+      """Get the shared state, loading the moves file if it hasn't been loaded yet."""
+
+      self.__dict__ = self.__shared_state
+
+      #if the moves file has changed, load the new one
+      fn = os.path.join(settings.path, "data", globs.MOVES)
+      if fn != self.fn:
+         self.load(fn)
+
+   def load(self, fn):
+      """
+      Parse the moves file and index each move by id.
+
+      fn - the path to the moves XML file.
+      """
+
+      #create a record for each <move> node
+      root = data.getTreeRoot(fn)
+      moves = {}
+      for m in data.getChildren(root, "move"):
+         moveId = data.getAttr(m, "id", data.D_STRING)
+         moves[moveId] = MoveData(moveId,
+                                  data.getAttr(m, "name", data.D_STRING),
+                                  data.getAttr(m, "pp", data.D_INT))
+
+      #store the index
+      self.fn = fn
+      self.moves = moves
+
+   def __getitem__(self, moveId):
+      """Get the record for a move by id, raising an error if it doesn't exist."""
+
+      try:
+         return self.moves[moveId]
+      except KeyError:
+         raise error.DInvalidResourceError(self.fn, "MOVE %s" % moveId)
+
 class Move():
    def __init__(self, moveId):
       self.moveId = moveId
-      
-      fn = os.path.join(settings.path, "data", globs.MOVES)
-      root = data.getTreeRoot(fn)
 
-      self.moveNode = None
-      for m in data.getChildren(root, "move"):
-         if data.getAttr(m, "id", data.D_STRING) == moveId:
-            self.moveNode = m
-            break
-      if self.moveNode is None:
-         raise error.DittoInvalidResourceException(fn, "MOVE %s" % self.moveId)
-
-      self.name = data.getAttr(self.moveNode, "name", data.D_STRING)
-      self.maxPP = data.getAttr(self.moveNode, "pp", data.D_INT)
+      moveData = MoveDB()[moveId]
+
+      self.name = moveData.name
+      self.maxPP = moveData.pp
       self.currPP = self.maxPP
@@ -98,15 +98,10 @@ class PartyBox():
       self.location = location
       self.poke = poke
 
-      self.speciesNode = poke.speciesNode
-
-      graphicsNode = data.getChild(self.speciesNode, "graphics")
-      iconNode = data.getChild(graphicsNode, "icon")
-      fn = os.path.join(settings.path, "data", data.getAttr(iconNode, "file", data.D_STRING))
-      image = data.getImage(fn, iconNode.ditto_fn)
-      self.iconSize = data.getAttr(iconNode, "size", data.D_INT2LIST)
+      fn, self.iconSize, transparency = poke.getSpecies().icon
+      image = data.getImage(fn, pokemon.SpeciesDB().fn)
       self.icon = image.subsurface((0,0), self.iconSize)
-      self.icon.set_colorkey(data.getAttr(iconNode, "transparency", data.D_INT3LIST))
+      self.icon.set_colorkey(transparency)
 
    def draw(self):
       self.screen.blit(self.box, self.location)
@@ -1,9 +1,6 @@
 import foreground_object
 import box
-import globs
-import font
-import settings
-import os
+import ui_assets
 import pygame
 import party_screen
 import game_input
@@ -14,7 +11,8 @@ class PauseMenu(foreground_object.ForegroundObject):
    def __init__(self, screen, game, fn):      
       self.screen = screen
       self.game = game
-      self.font = font.Font(os.path.join(settings.path, "data", globs.FONT)) #create the font
+      assets = ui_assets.UIAssets()
+      self.font = assets.getFont() #get the shared font
 
       self.menuNode = data.getTreeRoot(fn)
 
@@ -28,11 +26,7 @@ class PauseMenu(foreground_object.ForegroundObject):
 
       self.current = 0
 
-      fn = os.path.join(settings.path, "data", globs.DIALOG)
-      root = ET.parse(fn).getroot()
-      self.transparency = map(int, root.attrib["transparency"].split(","))
-      self.sideCursor = pygame.image.load(os.path.join(settings.path, "data", root.attrib["sidecursor"])).convert(self.screen) ##load the side cursor image, and convert
-      self.sideCursor.set_colorkey(self.transparency) ##set the transparency
+      self.sideCursor = assets.getCursors()[1] ##get the shared side cursor
 
       width = max(map(self.font.calcWidth, self.choices)) + self.border*2 + self.sideCursor.get_width()
       self.size = (width, (self.border*2)+(self.font.height*len(self.choices))+(self.lineBuffer*(len(self.choices)-1)))
@@ -47,6 +41,8 @@ class PauseMenu(foreground_object.ForegroundObject):
          i += 1
       
       self.busy = True
+      self.changed = True
+      self.needsBackground = False
 
    def inputButton(self, button):
       if self.foregroundObject is None:
@@ -57,9 +53,11 @@ class PauseMenu(foreground_object.ForegroundObject):
          elif button == game_input.BT_UP:
             if self.current > 0:
                self.current -= 1
+               self.changed = True
          elif button == game_input.BT_DOWN:
             if self.current < len(self.choices)-1:
                self.current += 1
+               self.changed = True
       else:
          self.foregroundObject.inputButton(button)
 
@@ -67,14 +65,27 @@ class PauseMenu(foreground_object.ForegroundObject):
       if self.foregroundObject is None:
          self.screen.blit(self.box, self.location)
          self.screen.blit(self.sideCursor, (self.location[0]+self.border, self.location[1]+self.border+(self.current*(self.font.height+self.lineBuffer))))
+         self.changed = False
+         self.needsBackground = False
       else:
          self.foregroundObject.draw()
 
+   def getDirtyRects(self):
+      if self.foregroundObject is not None:
+         return self.foregroundObject.getDirtyRects()
+      elif self.needsBackground: #a sub menu has just closed, so whatever it covered needs redrawing
+         return None
+      elif self.changed:
+         return [pygame.Rect(self.location, self.size)]
+      else:
+         return []
+
    def tick(self):
       if self.foregroundObject is not None:
          self.foregroundObject.tick()
          if not self.foregroundObject.busy:
             self.foregroundObject = None
+            self.needsBackground = True
 
    def choose(self, choice):
       if choice == "POKEMON":
@@ -8,6 +8,8 @@ import pokemon
 import sound
 import data
 import error
+import map_prefetch
+import tilemap
 
 STATUSNAMES = {"surf": sprite.S_TERRAIN}
 
@@ -56,12 +58,7 @@ class Player(sprite.Sprite):
             self.position = self.position[0]+con.size[0], self.position[1]-offset
             self.destination = self.position[0]-1, self.position[1]
             self.map = con
-            hold.connectedMaps = {}
-            self.map.loadConnections()
-            self.map.connectedMaps[sprite.DIR_RIGHT] = (hold, -1*offset)
-            del(hold.sprites["PLAYER"])
-            self.map.sprites["PLAYER"] = self
-            sound.playMusic(self.map.music)
+            self.crossConnection(hold, sprite.DIR_RIGHT, -1*offset)
       elif (self.destination[0] >= self.map.size[0]) and self.busy:
             hold = self.map
             con = self.map.connectedMaps[sprite.DIR_RIGHT][0]
@@ -69,12 +66,7 @@ class Player(sprite.Sprite):
             self.position = self.position[0]-self.map.size[0], self.position[1]-offset
             self.destination = self.position[0]+1, self.position[1]
             self.map = con
-            hold.connectedMaps = {}
-            self.map.loadConnections()
-            self.map.connectedMaps[sprite.DIR_LEFT] = (hold, -1*offset)
-            del(hold.sprites["PLAYER"])
-            self.map.sprites["PLAYER"] = self
-            sound.playMusic(self.map.music)
+            self.crossConnection(hold, sprite.DIR_LEFT, -1*offset)
       elif (self.destination[1] < 0) and self.busy:
             hold = self.map
             con = self.map.connectedMaps[sprite.DIR_UP][0]
@@ -82,12 +74,7 @@ class Player(sprite.Sprite):
             self.position = self.position[0]-offset, self.position[1]+con.size[1]
             self.destination = self.position[0], self.position[1]-1
             self.map = con
-            hold.connectedMaps = {}
-            self.map.loadConnections()
-            self.map.connectedMaps[sprite.DIR_DOWN] = (hold, -1*offset)
-            del(hold.sprites["PLAYER"])
-            self.map.sprites["PLAYER"] = self
-            sound.playMusic(self.map.music)
+            self.crossConnection(hold, sprite.DIR_DOWN, -1*offset)
       elif (self.destination[1] >= self.map.size[1]) and self.busy:
             hold = self.map
             con = self.map.connectedMaps[sprite.DIR_DOWN][0]
@@ -95,21 +82,60 @@ class Player(sprite.Sprite):
             self.position = self.position[0]-offset, self.position[1]-self.map.size[1]
             self.destination = self.position[0], self.position[1]+1
             self.map = con
-            hold.connectedMaps = {}
-            self.map.loadConnections()
-            self.map.connectedMaps[sprite.DIR_UP] = (hold, -1*offset)
-            del(hold.sprites["PLAYER"])
-            self.map.sprites["PLAYER"] = self
-            sound.playMusic(self.map.music)
+            self.crossConnection(hold, sprite.DIR_UP, -1*offset)
+
+      #if we've started a step, prefetch the maps we might be heading for
+      if self.busy:
+         map_prefetch.MapPrefetcher().predict(self.map, self.destination, direction)
+
+   def crossConnection(self, hold, back, offset):
+      """
+      Make the map we've just walked onto the main map.
+
+      The old map stays loaded as a connection of the new one,
+      and any other maps connected to it are released to the map cache.
+
+      hold - the map we've walked off.
+      back - the direction of the old map from the new one.
+      offset - the offset of the old map from the new one.
+      """
+
+      #release the old map's other connections
+      for key in hold.connectedMaps:
+         con = hold.connectedMaps[key][0]
+         if con is not self.map:
+            tilemap.releaseMap(con)
+      hold.connectedMaps = {}
+
+      #connect the old map to the new one, then load the new one's other connections
+      self.map.connectedMaps[back] = (hold, offset)
+      self.map.loadConnections()
+
+      #move the player across, so scripts need to look up sprites on both maps again
+      del(hold.sprites["PLAYER"])
+      self.map.sprites["PLAYER"] = self
+      hold.invalidateBindings()
+      self.map.invalidateBindings()
+      sound.playMusic(self.map.music)
 
    def transferTo(self, mMap, position):
-      del(self.map.sprites["PLAYER"])
-      self.map.connectedMaps = {}
+      #release the old map and its connections, unless we're staying on them
+      hold = self.map
+      del(hold.sprites["PLAYER"])
+      for key in hold.connectedMaps:
+         con = hold.connectedMaps[key][0]
+         if con is not mMap:
+            tilemap.releaseMap(con)
+      hold.connectedMaps = {}
+      if hold is not mMap:
+         tilemap.releaseMap(hold)
       
       self.map = mMap
       self.position = position
 
       self.map.sprites["PLAYER"] = self
+      hold.invalidateBindings()
+      self.map.invalidateBindings()
       self.map.loadConnections()
 
       sound.playMusic(self.map.music)
@@ -1,11 +1,13 @@
 import globs
 import random
+import collections
 import settings
 import xml.etree.ElementTree as ET
 import os
 import pygame
 import data
 import moves
+import error
 
 #define constants
 ST_HP = 0
@@ -19,26 +21,104 @@ G_MALE = 0
 G_FEMALE = 1
 G_NONE = 2
 
-class Pokemon():
-   def __init__(self, species, level):
-      self.species = species
+#compact record of a species' data
+#baseStats is indexed by the stat constants, learnset is a list of (level, move id) sorted by level
+#battler is (image path, transparency), icon is (image path, size, transparency)
+Species = collections.namedtuple("Species", ["id", "name", "dex", "type1", "type2",
+                                             "baseStats", "learnset", "battler", "icon"])
+
+class SpeciesDB():
+   """
+   Index of species data, loaded once from the pokemon XML file.
+
+   Borg singleton, so every instance shares the same index.
+   """
+
+   #borg singleton
+   __shared_state = {"fn": None, "species": {}}
+   
+   def __init__(self):
+      """Get the shared state, loading the pokemon file if it hasn't been loaded yet."""
+
+      self.__dict__ = self.__shared_state
 
+      #if the pokemon file has changed, load the new one
       fn = os.path.join(settings.path, "data", globs.POKEMON)
-      root = data.getTreeRoot(fn, "Ditto main")
+      if fn != self.fn:
+         self.load(fn)
 
+   def load(self, fn):
+      """
+      Parse the pokemon file and index each species by id.
+
+      fn - the path to the pokemon XML file.
+      """
+
+      #create a record for each <species> node
+      root = data.getTreeRoot(fn, "Ditto main")
+      species = {}
       for sp in data.getChildren(root, "species"):
-         if data.getAttr(sp, "id", data.D_STRING) == self.species:
-            self.speciesNode = sp
-            break                           
+         speciesId = data.getAttr(sp, "id", data.D_STRING)
+
+         typeNode = data.getChild(sp, "type")
+
+         statsNode = data.getChild(sp, "basestats")
+         baseStats = [0]*6
+         baseStats[ST_HP] = data.getAttr(statsNode, "hp", data.D_INT)
+         baseStats[ST_ATTACK] = data.getAttr(statsNode, "attack", data.D_INT)
+         baseStats[ST_DEFENSE] = data.getAttr(statsNode, "defense", data.D_INT)
+         baseStats[ST_SPATTACK] = data.getAttr(statsNode, "spatk", data.D_INT)
+         baseStats[ST_SPDEFENSE] = data.getAttr(statsNode, "spdef", data.D_INT)
+         baseStats[ST_SPEED] = data.getAttr(statsNode, "speed", data.D_INT)
+
+         movesNode = data.getChild(sp, "attacks")
+         learnset = sorted([(data.getAttr(m, "level", data.D_INT), data.getAttr(m, "id", data.D_STRING))
+                            for m in data.getChildren(movesNode, "move")], key=lambda a: a[0])
+
+         graphicsNode = data.getChild(sp, "graphics")
+         battleNode = data.getChild(graphicsNode, "battle")
+         battler = (os.path.join(settings.path, "data", data.getAttr(battleNode, "front", data.D_STRING)),
+                    data.getAttr(battleNode, "transparency", data.D_INT3LIST))
+         iconNode = data.getChild(graphicsNode, "icon")
+         icon = (os.path.join(settings.path, "data", data.getAttr(iconNode, "file", data.D_STRING)),
+                 data.getAttr(iconNode, "size", data.D_INT2LIST),
+                 data.getAttr(iconNode, "transparency", data.D_INT3LIST))
+
+         species[speciesId] = Species(speciesId,
+                                      data.getAttr(sp, "name", data.D_STRING),
+                                      data.getAttr(sp, "dex", data.D_STRING),
+                                      data.getAttr(typeNode, "primary", data.D_STRING),
+                                      data.getOptionalAttr(typeNode, "secondary", data.D_STRING, None),
+                                      tuple(baseStats),
+                                      tuple(learnset),
+                                      battler,
+                                      icon)
+
+      #store the index
+      self.fn = fn
+      self.species = species
+
+   def __getitem__(self, speciesId):
+      """Get the record for a species by id, raising an error if it doesn't exist."""
+
+      try:
+         return self.species[speciesId]
+      except KeyError:
+         raise error.DInvalidResourceError(self.fn, "SPECIES %s" % speciesId)
+
+class Pokemon():
+   def __init__(self, species, level):
+      self.species = species
+
+      speciesData = self.getSpecies()
       
       self.nickname = None
       
       self.level = level
       self.exp = 0
 
-      typeNode = data.getChild(self.speciesNode, "type")
-      self.type1 = data.getAttr(typeNode, "primary", data.D_STRING)
-      self.type2 = data.getOptionalAttr(typeNode, "secondary", data.D_STRING, None)
+      self.type1 = speciesData.type1
+      self.type2 = speciesData.type2
 
       self.PID = random.randint(0, 4294967295)
       self.trainer = None
@@ -75,27 +155,22 @@ class Pokemon():
       self.status = None
 
       self.moves = [None, None, None, None]
-      movesNode = data.getChild(self.speciesNode, "attacks")
-      moveNodes = sorted(data.getChildren(movesNode, "move"), key=lambda n: int(n.attrib["level"]))
       i = 0
-      for node in moveNodes[-4:]:
-         self.moves[i] = moves.Move(data.getAttr(node, "id", data.D_STRING))
+      for level, moveId in speciesData.learnset[-4:]:
+         self.moves[i] = moves.Move(moveId)
          i += 1
       
       self.ballCaughtIn = 0
 
       self.heldItem = None
 
-   def calcStats(self):
-      statsNode = data.getChild(self.speciesNode, "basestats")
+   def getSpecies(self):
+      """Get the species record for this pokemon."""
       
-      baseStats = {}
-      baseStats[ST_HP] = data.getAttr(statsNode, "hp", data.D_INT)
-      baseStats[ST_ATTACK] = data.getAttr(statsNode, "attack", data.D_INT)
-      baseStats[ST_DEFENSE] = data.getAttr(statsNode, "defense", data.D_INT)
-      baseStats[ST_SPATTACK] = data.getAttr(statsNode, "spatk", data.D_INT)
-      baseStats[ST_SPDEFENSE] = data.getAttr(statsNode, "spdef", data.D_INT)
-      baseStats[ST_SPEED] = data.getAttr(statsNode, "speed", data.D_INT)
+      return SpeciesDB()[self.species]
+
+   def calcStats(self):
+      baseStats = self.getSpecies().baseStats
 
       self.stats[ST_HP] = (((self.IVs[ST_HP]+(2*baseStats[ST_HP])+(self.EVs[ST_HP]/4)+100)*self.level)/100)+10
 
@@ -104,15 +179,13 @@ class Pokemon():
 
    def getName(self):
       if self.nickname is None:
-         return data.getAttr(self.speciesNode, "name", data.D_STRING)
+         return self.getSpecies().name
       else:
          return self.nickname
 
    def getBattler(self):
-      graphicsNode = data.getChild(self.speciesNode, "graphics")
-      battleNode = data.getChild(graphicsNode, "battle")
-      battler = data.getImage(os.path.join(settings.path, "data", data.getAttr(battleNode, "front", data.D_STRING)), battleNode.ditto_fn)
-      trans = data.getAttr(battleNode, "transparency", data.D_INT3LIST)
+      path, trans = self.getSpecies().battler
+      battler = data.getImage(path, SpeciesDB().fn)
       battler.set_colorkey(trans)
 
       return battler
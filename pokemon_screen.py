@@ -54,7 +54,6 @@ class PokemonScreen(foreground_object.ForegroundObject):
 
       #get the required pokemon
       self.poke = self.party[self.currentPoke]
-      speciesNode = self.poke.speciesNode
 
       #get the <main> child of the <pokemon> node
       mainNode = data.getChild(self.menuNode, "main")
@@ -154,7 +153,7 @@ class InfoPage(foreground_object.ForegroundObject):
       fn = os.path.join(settings.path, "data", data.getAttr(infoNode, "box", data.D_STRING))
       self.infoBox = box.Box(size, fn).convert(self.screen)
 
-      info = {"No.": data.getAttr(poke.speciesNode, "dex", data.D_STRING),
+      info = {"No.": poke.getSpecies().dex,
               "Name": poke.getName(),
               "Type": "TODO",
               "OT": str(poke.trainer),
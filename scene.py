@@ -6,7 +6,13 @@ class Scene():
       pass
 
    def drawFrame(self):
-      pass
+      """
+      Draw a frame to the screen.
+
+      Returns a list of the rects changed, or None if the whole screen may have changed.
+      """
+      
+      return None
 
    def tick(self):
       return True
@@ -2,3 +2,4 @@ from script import Script
 from script_interpreter import ScriptEngine
 from scriptable_object import ScriptableObject
 from script_error import DLookupError
+from script_cache import flush as flushCache
@@ -0,0 +1,49 @@
+import sys, os
+import re
+
+#the tables are written next to this file, as modules of the script engine package
+OUTPUTDIR = os.path.dirname(os.path.abspath(__file__))
+
+def removeTable(name):
+   #remove an old table, so it's rebuilt rather than read
+   for ext in (".py", ".pyc", ".pyo"):
+      fn = os.path.join(OUTPUTDIR, name + ext)
+      if os.path.exists(fn):
+         os.remove(fn)
+
+def main():
+   """
+   Build the script lexer and parser tables into package-local modules.
+
+   The game reads these on the first script compile rather than generating the tables itself.
+   Run this whenever script_lex.py or script_yacc.py changes.
+   """
+
+   #import from this directory, as the game's package imports do, with the game's modules also available
+   sys.path[0:0] = [OUTPUTDIR, os.path.dirname(OUTPUTDIR)]
+   import script_lex
+   import script_yacc
+
+   #build and write the tables
+   removeTable(script_lex.LEXTAB)
+   removeTable(script_yacc.PARSETAB)
+   script_lex.buildLexer(script_lex.LEXTAB, OUTPUTDIR)
+   script_yacc.buildParser(script_yacc.PARSETAB, OUTPUTDIR)
+
+   #the parser table records its own path, and the path of the grammar file for each production
+   #replace them with just the file names, so the tables are the same whichever machine builds them
+   fn = os.path.join(OUTPUTDIR, script_yacc.PARSETAB + ".py")
+   f = open(fn, "r")
+   tables = f.read()
+   f.close()
+   tables = tables.replace(fn, os.path.basename(fn))
+   tables = re.sub(r"'[^',]*script_yacc\.pyc?'", "'script_yacc.py'", tables)
+   f = open(fn, "w")
+   f.write(tables)
+   f.close()
+
+   print "Built %s and %s in %s" % (script_lex.LEXTAB, script_yacc.PARSETAB, OUTPUTDIR)
+
+#if we're being used as the entry point, build the tables
+if __name__ == "__main__":
+   main()
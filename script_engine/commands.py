@@ -1,8 +1,28 @@
-CMD_ASSIGN = 0
-CMD_EVAL = 1
-CMD_GOTOREL = 2
-CMD_IFFALSEGOTOREL = 3
-CMD_PRINT = 4
-CMD_COMMANDCALL = 5
-CMD_COMMANDASSIGN = 6
+import operator
 
+#opcodes
+#each instruction is a tuple (opcode, argument)
+OP_PUSHCONST = 0 #push consts[arg]
+OP_LOADVAR = 1 #push the value of the identifier chain names[arg]
+OP_STOREVAR = 2 #pop a value and store it in the identifier chain names[arg]
+OP_BINOP = 3 #pop two values and push the result of BINOPS[arg] on them
+OP_CALL = 4 #arg is (name index, argument count), pop the arguments and push the command's result
+OP_POP = 5 #pop and discard a value
+OP_PRINT = 6 #pop a value and print it
+OP_JUMP = 7 #go to instruction arg
+OP_JUMPIFFALSE = 8 #pop a value, and go to instruction arg if it's false
+
+#binary operators, as (symbol, function)
+#the index into this list is the argument to OP_BINOP
+BINOPS = [("+", operator.add),
+          ("-", operator.sub),
+          ("*", operator.mul),
+          ("/", operator.div),
+          ("==", operator.eq),
+          (">", operator.gt),
+          ("<", operator.lt),
+          (">=", operator.ge),
+          ("<=", operator.le)]
+
+#just the operator functions, for the interpreter loop
+BINOPFUNCTIONS = [function for symbol, function in BINOPS]
@@ -0,0 +1,73 @@
+import os
+import threading
+import Queue
+
+import commands
+
+import settings
+
+#opcode names, for writing out bytecode
+OPNAMES = dict([(getattr(commands, name), name) for name in dir(commands) if name.startswith("OP_")])
+
+#queue of dumps waiting to be written, and the thread writing them, when dumping asynchronously
+dumpQueue = Queue.Queue()
+dumpWorker = None
+
+def isEnabled(scriptId, requested=False):
+   #dumping is on for a script if it asks for it, or settings turn it on for it or for all scripts
+   return requested or settings.scriptDump or (scriptId in settings.scriptDumpIds)
+
+def getDumpPath(fn, scriptId, ext):
+   name = "%s_%s%s" % (os.path.splitext(os.path.basename(fn))[0], scriptId, ext)
+   return os.path.join(settings.scriptDumpPath, name)
+
+def writeAST(ast, fn):
+   f = open(fn, "w")
+   ast.pprint(f)
+   f.close()
+
+def writeCommands(cmds, fn, lines=None, consts=None, names=None):
+   #write one instruction per line, with its source line and what its argument refers to if known
+   f = open(fn, "w")
+   for i, cmd in enumerate(cmds):
+      op, arg = cmd
+      line = "%4i %-16s %s" % (i, OPNAMES.get(op, op), str(arg))
+      if lines is not None:
+         line = "%s  (line %i)" % (line.ljust(32), lines[i])
+      if consts is not None and op == commands.OP_PUSHCONST:
+         line += "  %r" % (consts[arg],)
+      elif names is not None and op in (commands.OP_LOADVAR, commands.OP_STOREVAR):
+         line += "  %s" % ".".join(names[arg])
+      elif names is not None and op == commands.OP_CALL:
+         line += "  %s" % ".".join(names[arg[0]])
+      f.write(line)
+      f.write("\n")
+   f.close()
+
+def writeDump(fn, scriptId, ast, bytecode):
+   if not os.path.isdir(settings.scriptDumpPath):
+      os.makedirs(settings.scriptDumpPath)
+   code, lines, consts, names = bytecode
+   writeAST(ast, getDumpPath(fn, scriptId, ".ast.txt"))
+   writeCommands(code, getDumpPath(fn, scriptId, ".cmds.txt"), lines, consts, names)
+
+def dump(fn, scriptId, ast, bytecode):
+   #write out the AST and bytecode of a compiled script
+   #when dumping asynchronously, they're written on a worker thread so compiling doesn't wait on the disk
+   global dumpWorker
+   if settings.scriptDumpAsync:
+      if dumpWorker is None:
+         dumpWorker = threading.Thread(target=work)
+         dumpWorker.daemon = True
+         dumpWorker.start()
+      dumpQueue.put((fn, scriptId, ast, bytecode))
+   else:
+      writeDump(fn, scriptId, ast, bytecode)
+
+def work():
+   while True:
+      fn, scriptId, ast, bytecode = dumpQueue.get()
+      try:
+         writeDump(fn, scriptId, ast, bytecode)
+      except (IOError, OSError) as e:
+         print "Couldn't dump script %s: %s" % (scriptId, e)
@@ -1,55 +0,0 @@
-
-# parsetab.py
-# This file is automatically generated. Do not edit.
-_tabversion = '3.2'
-
-_lr_method = 'LALR'
-
-_lr_signature = '\xc6\xe0\xaf\xf7x\x01\x916\xd6\n(v\x1f\xac\rl'
-    
-_lr_action_items = {'NUMBER':([4,6,7,8,11,22,23,24,26,27,28,29,30,31,37,],[10,10,10,10,10,10,10,10,10,10,10,10,10,10,10,]),'PRINT':([0,2,3,9,25,34,35,38,49,51,52,56,],[4,4,-1,-2,-6,4,-9,-7,-4,4,-8,-5,]),'MINUS':([5,10,12,13,14,16,19,20,21,32,39,40,41,42,43,44,45,46,47,48,53,],[-23,-21,-25,31,-22,31,31,31,31,-24,-26,-17,-19,-15,31,-14,-18,-20,-12,-13,31,]),'DOT':([5,],[15,]),'RBRACE':([3,9,25,35,38,49,51,52,56,],[-1,-2,-6,-9,-7,-4,55,-8,-5,]),'LE':([5,10,12,13,14,16,19,20,21,32,39,40,41,42,43,44,45,46,47,48,53,],[-23,-21,-25,29,-22,29,29,29,29,-24,-26,-17,-19,29,29,29,-18,-20,29,29,29,]),'RPAREN':([5,7,10,12,14,18,19,21,32,39,40,41,42,43,44,45,46,47,48,53,],[-23,17,-21,-25,-22,36,-10,39,-24,-26,-17,-19,-15,-16,-14,-18,-20,-12,-13,-11,]),'SEMI':([5,10,12,13,14,17,20,32,36,39,40,41,42,43,44,45,46,47,48,],[-23,-21,-25,25,-22,35,38,-24,52,-26,-17,-19,-15,-16,-14,-18,-20,-12,-13,]),'LT':([5,10,12,13,14,16,19,20,21,32,39,40,41,42,43,44,45,46,47,48,53,],[-23,-21,-25,28,-22,28,28,28,28,-24,-26,-17,-19,28,28,28,-18,-20,28,28,28,]),'PLUS':([5,10,12,13,14,16,19,20,21,32,39,40,41,42,43,44,45,46,47,48,53,],[-23,-21,-25,30,-22,30,30,30,30,-24,-26,-17,-19,-15,30,-14,-18,-20,-12,-13,30,]),'COMMA':([5,10,12,14,18,19,32,39,40,41,42,43,44,45,46,47,48,53,],[-23,-21,-25,-22,37,-10,-24,-26,-17,-19,-15,-16,-14,-18,-20,-12,-13,-11,]),'STRING':([4,6,7,8,11,22,23,24,26,27,28,29,30,31,37,],[14,14,14,14,14,14,14,14,14,14,14,14,14,14,14,]),'IDENTIFIER':([0,2,3,4,6,7,8,9,11,15,22,23,24,25,26,27,28,29,30,31,34,35,37,38,49,51,52,56,],[5,5,-1,5,5,5,5,-2,5,5,5,5,5,-6,5,5,5,5,5,5,5,-9,5,-7,-4,5,-8,-5,]),'ASSIGN':([1,5,32,],[8,-23,-24,]),'$end':([2,3,9,25,35,38,49,52,56,],[0,-1,-2,-6,-9,-7,-4,-8,-5,]),'GT':([5,10,12,13,14,16,19,20,21,32,39,40,41,42,43,44,45,46,47,48,53,],[-23,-21,-25,22,-22,22,22,22,22,-24,-26,-17,-19,22,22,22,-18,-20,22,22,22,]),'DIVIDE':([5,10,12,13,14,16,19,20,21,32,39,40,41,42,43,44,45,46,47,48,53,],[-23,-21,-25,24,-22,24,24,24,24,-24,-26,-17,-19,-15,24,-14,-18,-20,24,24,24,]),'EQUALS':([5,10,12,13,14,16,19,20,21,32,39,40,41,42,43,44,45,46,47,48,53,],[-23,-21,-25,26,-22,26,26,26,26,-24,-26,-17,-19,-15,26,-14,-18,-20,-12,-13,26,]),'TIMES':([5,10,12,13,14,16,19,20,21,32,39,40,41,42,43,44,45,46,47,48,53,],[-23,-21,-25,27,-22,27,27,27,27,-24,-26,-17,-19,-15,27,-14,-18,-20,27,27,27,]),'GE':([5,10,12,13,14,16,19,20,21,32,39,40,41,42,43,44,45,46,47,48,53,],[-23,-21,-25,23,-22,23,23,23,23,-24,-26,-17,-19,23,23,23,-18,-20,23,23,23,]),'LPAREN':([1,4,5,6,7,8,11,22,23,24,26,27,28,29,30,31,32,37,],[7,11,-23,11,11,11,11,11,11,11,11,11,11,11,11,11,-24,11,]),'ENDIF':([33,54,55,],[49,56,-3,]),'ELSE':([33,55,],[50,-3,]),'IF':([0,2,3,9,25,34,35,38,49,51,52,56,],[6,6,-1,-2,-6,6,-9,-7,-4,6,-8,-5,]),'LBRACE':([5,10,12,14,16,32,39,40,41,42,43,44,45,46,47,48,50,],[-23,-21,-25,-22,34,-24,-26,-17,-19,-15,-16,-14,-18,-20,-12,-13,34,]),}
-
-_lr_action = { }
-for _k, _v in _lr_action_items.items():
-   for _x,_y in zip(_v[0],_v[1]):
-      if not _x in _lr_action:  _lr_action[_x] = { }
-      _lr_action[_x][_k] = _y
-del _lr_action_items
-
-_lr_goto_items = {'statementblock':([16,50,],[33,54,]),'statementlist':([0,34,],[2,51,]),'expressionlist':([7,],[18,]),'statement':([0,2,34,51,],[3,9,3,9,]),'identifierchain':([0,2,4,6,7,8,11,15,22,23,24,26,27,28,29,30,31,34,37,51,],[1,1,12,12,12,12,12,32,12,12,12,12,12,12,12,12,12,1,12,1,]),'expression':([4,6,7,8,11,22,23,24,26,27,28,29,30,31,37,],[13,16,19,20,21,40,41,42,43,44,45,46,47,48,53,]),}
-
-_lr_goto = { }
-for _k, _v in _lr_goto_items.items():
-   for _x,_y in zip(_v[0],_v[1]):
-       if not _x in _lr_goto: _lr_goto[_x] = { }
-       _lr_goto[_x][_k] = _y
-del _lr_goto_items
-_lr_productions = [
-  ("S' -> statementlist","S'",1,None,None,None),
-  ('statementlist -> statement','statementlist',1,'p_statementlist','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',13),
-  ('statementlist -> statementlist statement','statementlist',2,'p_statementlist','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',14),
-  ('statementblock -> LBRACE statementlist RBRACE','statementblock',3,'p_statementblock','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',25),
-  ('statement -> IF expression statementblock ENDIF','statement',4,'p_statement_if','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',30),
-  ('statement -> IF expression statementblock ELSE statementblock ENDIF','statement',6,'p_statement_if','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',31),
-  ('statement -> PRINT expression SEMI','statement',3,'p_statement_print','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',41),
-  ('statement -> identifierchain ASSIGN expression SEMI','statement',4,'p_statement_assign','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',47),
-  ('statement -> identifierchain LPAREN expressionlist RPAREN SEMI','statement',5,'p_statement_command','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',53),
-  ('statement -> identifierchain LPAREN RPAREN SEMI','statement',4,'p_statement_command','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',54),
-  ('expressionlist -> expression','expressionlist',1,'p_expressionlist','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',63),
-  ('expressionlist -> expressionlist COMMA expression','expressionlist',3,'p_expressionlist','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',64),
-  ('expression -> expression PLUS expression','expression',3,'p_expression_binop','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',74),
-  ('expression -> expression MINUS expression','expression',3,'p_expression_binop','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',75),
-  ('expression -> expression TIMES expression','expression',3,'p_expression_binop','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',76),
-  ('expression -> expression DIVIDE expression','expression',3,'p_expression_binop','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',77),
-  ('expression -> expression EQUALS expression','expression',3,'p_expression_binop','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',78),
-  ('expression -> expression GT expression','expression',3,'p_expression_binop','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',79),
-  ('expression -> expression LT expression','expression',3,'p_expression_binop','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',80),
-  ('expression -> expression GE expression','expression',3,'p_expression_binop','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',81),
-  ('expression -> expression LE expression','expression',3,'p_expression_binop','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',82),
-  ('expression -> NUMBER','expression',1,'p_expression_num','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',87),
-  ('expression -> STRING','expression',1,'p_expression_string','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',91),
-  ('identifierchain -> IDENTIFIER','identifierchain',1,'p_identifierchain','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',96),
-  ('identifierchain -> IDENTIFIER DOT identifierchain','identifierchain',3,'p_identifierchain','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',97),
-  ('expression -> identifierchain','expression',1,'p_expression_identifier','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',106),
-  ('expression -> LPAREN expression RPAREN','expression',3,'p_expression_expr','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',111),
-]
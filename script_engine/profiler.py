@@ -0,0 +1,95 @@
+import os
+import json
+import timeit
+
+import diagnostics
+
+import settings
+
+#the most accurate timer for the platform
+timer = timeit.default_timer
+
+class ScriptProfiler():
+   #records instruction counts and time per script, per line, per instruction type, and per command called
+   #each record is stored as [count, time]
+   def __init__(self):
+      self.reset()
+
+   def reset(self):
+      self.scripts = {}
+      self.lines = {}
+      self.ops = {}
+      self.commands = {}
+
+   def record(self, script, line, op, elapsed):
+      for table, key in ((self.scripts, (script.fn, script.scriptId)),
+                         (self.lines, (script.fn, script.scriptId, line)),
+                         (self.ops, diagnostics.OPNAMES.get(op, str(op)))):
+         try:
+            entry = table[key]
+         except KeyError:
+            entry = table[key] = [0, 0.0]
+         entry[0] += 1
+         entry[1] += elapsed
+
+   def recordCommand(self, name, elapsed):
+      try:
+         entry = self.commands[name]
+      except KeyError:
+         entry = self.commands[name] = [0, 0.0]
+      entry[0] += 1
+      entry[1] += elapsed
+
+   def getSorted(self, table):
+      #most expensive first
+      return sorted(table.items(), key=lambda item: item[1][1], reverse=True)
+
+   def getReport(self, maxLines=20):
+      out = []
+      out.append("Scripts:")
+      for (fn, scriptId), (count, elapsed) in self.getSorted(self.scripts):
+         out.append("  %10.6fs %8i  %s %s" % (elapsed, count, fn, scriptId))
+      out.append("Lines:")
+      for (fn, scriptId, line), (count, elapsed) in self.getSorted(self.lines)[:maxLines]:
+         out.append("  %10.6fs %8i  %s %s line %i" % (elapsed, count, fn, scriptId, line))
+      out.append("Instructions:")
+      for name, (count, elapsed) in self.getSorted(self.ops):
+         out.append("  %10.6fs %8i  %s" % (elapsed, count, name))
+      out.append("Commands:")
+      for name, (count, elapsed) in self.getSorted(self.commands):
+         out.append("  %10.6fs %8i  %s" % (elapsed, count, name))
+      return "\n".join(out)
+
+   def toDict(self):
+      def entries(table, fields):
+         result = []
+         for key, (count, elapsed) in self.getSorted(table):
+            if not isinstance(key, tuple):
+               key = (key,)
+            entry = dict(zip(fields, key))
+            entry["count"] = count
+            entry["time"] = elapsed
+            result.append(entry)
+         return result
+      return {"scripts": entries(self.scripts, ("file", "script")),
+              "lines": entries(self.lines, ("file", "script", "line")),
+              "instructions": entries(self.ops, ("name",)),
+              "commands": entries(self.commands, ("name",))}
+
+   def writeReport(self, fn):
+      f = open(fn, "w")
+      f.write(self.getReport())
+      f.write("\n")
+      f.close()
+
+   def writeJSON(self, fn):
+      f = open(fn, "w")
+      json.dump(self.toDict(), f, indent=1)
+      f.close()
+
+   def write(self):
+      #write both the text report and the JSON to scriptProfilePath
+      if not os.path.isdir(settings.scriptProfilePath):
+         os.makedirs(settings.scriptProfilePath)
+      self.writeReport(os.path.join(settings.scriptProfilePath, "profile.txt"))
+      self.writeJSON(os.path.join(settings.scriptProfilePath, "profile.json"))
@@ -1,40 +1,110 @@
 import os
 
-import script_yacc
 import script_compiler
+import script_cache
+import diagnostics
 
 import settings
 import data
 import events
 
-OUT_AST = ".\\ast.txt"
-OUT_CMDS = ".\\cmds.txt"
-
 SCRIPTSEP = "###"
 
-def getSource(fn, scriptId):
-   f = open(fn, "r")
-   lines = f.readlines()
-   f.close()
-
-   title = "%s%s%s" % (SCRIPTSEP, scriptId, SCRIPTSEP)
-
-   code = []
-   inCode = False
-   for i in range(0, len(lines)):
-      line = lines[i]
-      if not inCode:
-         if line.startswith(title):
-            inCode = True
-      else:
+class ScriptSourceIndex():
+   #borg singleton, so each file is only scanned once
+   __shared_state = {"files": {}}
+
+   def __init__(self):
+      self.__dict__ = self.__shared_state
+
+   def getIndex(self, fn):
+      #get the index of a script file, rescanning it if it's changed
+      #the index is stored as {scriptId: (offset, length, line number of first line)}
+      key = os.path.abspath(fn)
+      stamp = script_cache.getStamp(fn)
+      if self.files.has_key(key):
+         indexStamp, index = self.files[key]
+         if indexStamp == stamp:
+            return index
+
+      #scan the file a line at a time, noting where each script starts and ends
+      #a separator line ends the current script, and starts a new one if it has an id
+      #read in binary so the offsets are exact
+      index = {}
+      current = None
+      offset = 0
+      lineno = 0
+      f = open(fn, "rb")
+      for line in f:
+         lineno += 1
          if line.startswith(SCRIPTSEP):
-            inCode = False
-            break
-         else:
-            code.append(line)
+            if current is not None:
+               scriptId, start, firstLine = current
+               index[scriptId] = (start, offset-start, firstLine)
+               current = None
+            rest = line[len(SCRIPTSEP):]
+            if SCRIPTSEP in rest:
+               scriptId = rest.split(SCRIPTSEP)[0]
+               if not index.has_key(scriptId):
+                  current = (scriptId, offset+len(line), lineno+1)
+         offset += len(line)
+      f.close()
+      if current is not None:
+         scriptId, start, firstLine = current
+         index[scriptId] = (start, offset-start, firstLine)
+
+      self.files[key] = (stamp, index)
+      return index
+
+   def getSource(self, fn, scriptId):
+      #returns (source, line number of the first line)
+      #a missing script gives empty source
+      try:
+         offset, length, lineno = self.getIndex(fn)[scriptId]
+      except KeyError:
+         return "", 1
+      f = open(fn, "rb")
+      f.seek(offset)
+      source = f.read(length)
+      f.close()
+      return source.replace("\r\n", "\n"), lineno
+
+def getSource(fn, scriptId):
+   return ScriptSourceIndex().getSource(fn, scriptId)[0]
+
+def compileSource(source, fn, scriptId, lineno=1, dump=False):
+   #the parser is only imported when it's needed, as building it is slow
+   import script_yacc
+   import script_optimizer
+   ast = script_yacc.parse(source, fn, scriptId, lineno)
+   ast, saved = script_optimizer.optimize(ast)
+   if settings.scriptOptimizeReport:
+      print "Optimized %s, script %s: %i nodes saved" % (fn, scriptId, saved)
+   bytecode = script_compiler.toBytecode(ast)
+   script_optimizer.threadJumps(bytecode[0])
 
-   return "".join(code)        
-   
+   if dump:
+      diagnostics.dump(fn, scriptId, ast, bytecode)
+
+   return bytecode
+
+def getBytecode(fn, scriptId, dump=False):
+   #use the compiled script cache if the script hasn't changed, otherwise compile it
+   #if the source file is unchanged, the source needn't even be read
+   #scripts being dumped are always compiled, as the dump needs the AST
+   stamp = script_cache.getStamp(fn)
+   bytecode = None
+   if not dump:
+      bytecode = script_cache.lookup(fn, scriptId, stamp)
+   if bytecode is None:
+      source, lineno = ScriptSourceIndex().getSource(fn, scriptId)
+      digest = script_cache.getDigest("%i:%s" % (lineno, source))
+      if not dump:
+         bytecode = script_cache.lookup(fn, scriptId, stamp, digest)
+      if bytecode is None:
+         bytecode = compileSource(source, fn, scriptId, lineno, dump)
+      script_cache.store(fn, scriptId, stamp, digest, bytecode)
+   return bytecode
 
 class Script():
    def __init__(self, node, triggered=True):
@@ -49,32 +119,13 @@ class Script():
          elif trig == "newgame":
             self.trigger = events.EV_NEWGAME
 
-      fn = os.path.join(settings.path, "data", data.getAttr(node, "source", data.D_STRING))
-      scriptId = data.getAttr(node, "id", data.D_STRING)
+      self.fn = os.path.join(settings.path, "data", data.getAttr(node, "source", data.D_STRING))
+      self.scriptId = data.getAttr(node, "id", data.D_STRING)
 
-      source = getSource(fn, scriptId)
-      ast = script_yacc.parse(source, fn, scriptId)
-
-      f = open(OUT_AST, "w")
-      ast.pprint(f)
-      f.close()
-      
-      self.commands = script_compiler.toCommands(ast)
+      dump = diagnostics.isEnabled(self.scriptId, data.getOptionalAttr(node, "dump", data.D_STRING, "false") == "true")
+      self.code, self.lines, self.consts, self.names = getBytecode(self.fn, self.scriptId, dump)
+      self.localNames = script_compiler.getLocalNames(self.names)
+      self.bindings = [None]*len(self.names)
 
    def __getitem__(self, i):
-      return self.commands[i]
-
-def writeAST(ast, fn):
-   f = open(fn, "w")
-   ast.pprint(f)
-   f.close()
-
-def writeCommands(commands, fn):
-   f = open(fn, "w")
-   for cmd in commands:
-      f.write(str(cmd))
-      f.write("\n")
-   f.close()
-      
-      
-      
+      return self.code[i]
@@ -0,0 +1,79 @@
+import os
+import struct
+import marshal
+import hashlib
+
+#compiled script cache file constants
+#bump the version whenever the compiler's output changes
+CACHE_EXT = ".dsc"
+CACHE_MAGIC = "DSCR"
+CACHE_VERSION = 4
+CACHE_HEADER = "<4sHH" #magic, cache version, marshal version
+
+#loaded cache files, stored as {source filename: {scriptId: (stamp, digest, bytecode)}}
+#and the source filenames whose cache files need writing out
+cacheFiles = {}
+dirtyFiles = set()
+
+def getCachePath(fn):
+   return fn + CACHE_EXT
+
+def getStamp(fn):
+   #the modification time and size of a source file, to tell whether it may have changed
+   st = os.stat(fn)
+   return (st.st_mtime, st.st_size)
+
+def getDigest(source):
+   return hashlib.md5(source).hexdigest()
+
+def getEntries(fn):
+   #get the entries for a source file, loading its cache file the first time
+   #a missing, damaged or out of date cache file is treated as empty
+   key = os.path.abspath(fn)
+   if not cacheFiles.has_key(key):
+      entries = {}
+      try:
+         f = open(getCachePath(fn), "rb")
+         s = f.read()
+         f.close()
+         headerSize = struct.calcsize(CACHE_HEADER)
+         magic, version, marshalVersion = struct.unpack(CACHE_HEADER, s[:headerSize])
+         if (magic, version, marshalVersion) == (CACHE_MAGIC, CACHE_VERSION, marshal.version):
+            entries = marshal.loads(s[headerSize:])
+      except (IOError, struct.error, EOFError, ValueError, TypeError):
+         pass
+      cacheFiles[key] = entries
+   return cacheFiles[key]
+
+def lookup(fn, scriptId, stamp, digest=None):
+   #find the bytecode of a script, or None if it's not cached
+   #if the source file is unchanged any entry is valid, otherwise the digest of the script source must match
+   try:
+      entryStamp, entryDigest, bytecode = getEntries(fn)[scriptId]
+   except KeyError:
+      return None
+   if entryStamp == stamp or entryDigest == digest:
+      return bytecode
+   return None
+
+def store(fn, scriptId, stamp, digest, bytecode):
+   #store the bytecode of a script, marking the cache file to be written out if anything changed
+   entries = getEntries(fn)
+   entry = (stamp, digest, bytecode)
+   if entries.get(scriptId) == entry:
+      return
+   entries[scriptId] = entry
+   dirtyFiles.add(os.path.abspath(fn))
+
+def flush():
+   #write out every cache file with new entries
+   #the cache is only an optimisation, so don't worry if it can't be written
+   while dirtyFiles:
+      key = dirtyFiles.pop()
+      try:
+         f = open(getCachePath(key), "wb")
+         f.write(struct.pack(CACHE_HEADER, CACHE_MAGIC, CACHE_VERSION, marshal.version))
+         f.write(marshal.dumps(cacheFiles[key]))
+         f.close()
+      except IOError:
+         pass
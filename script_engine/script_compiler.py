@@ -1,39 +1,105 @@
 from commands import *
 
-def toCommands(node):
-   cmds = []
-   if node.kind == "STATEMENTLIST":
-      for child in node.children:
-         cmds += toCommands(child)
-   elif node.kind == "PRINT":
-      exprNode = node.children[0]
-      cmds.append([CMD_PRINT, exprNode])
-   elif node.kind == "ASSIGN":
-      idChainNode, exprNode = node.children
-      cmds.append([CMD_ASSIGN, idChainNode, exprNode])
-   elif node.kind == "ASSIGNCOMMAND":
-      idChainNode, commandNode = node.children
-      commandIdChainNode, commandArgListNode = commandNode.children
-      cmds.append([CMD_COMMANDASSIGN, idChainNode, commandNode])
-   elif node.kind == "COMMANDCALL":
-      commandNode = node.children[0]
+#map from operator symbol to OP_BINOP argument
+BINOPINDEXES = dict([(symbol, i) for i, (symbol, function) in enumerate(BINOPS)])
+
+class Compiler():
+   def __init__(self):
+      self.code = []
+      self.lines = []
+      self.consts = []
+      self.names = []
+
+   def emit(self, op, arg, lineno):
+      self.code.append((op, arg))
+      self.lines.append(lineno)
+      return len(self.code)-1
+
+   def patch(self, i, target):
+      op, arg = self.code[i]
+      self.code[i] = (op, target)
+
+   def addConst(self, value):
+      #pool equal constants, making sure 1 and "1" aren't confused
+      for i, c in enumerate(self.consts):
+         if type(c) == type(value) and c == value:
+            return i
+      self.consts.append(value)
+      return len(self.consts)-1
+
+   def addName(self, idChainNode):
+      chain = getChain(idChainNode)
+      try:
+         return self.names.index(chain)
+      except ValueError:
+         self.names.append(chain)
+         return len(self.names)-1
+
+   def compileStatement(self, node):
+      if node.kind == "STATEMENTLIST":
+         for child in node.children:
+            self.compileStatement(child)
+      elif node.kind == "PRINT":
+         self.compileExpression(node.children[0])
+         self.emit(OP_PRINT, None, node.lineno)
+      elif node.kind == "ASSIGN":
+         idChainNode, exprNode = node.children
+         self.compileExpression(exprNode)
+         self.emit(OP_STOREVAR, self.addName(idChainNode), node.lineno)
+      elif node.kind == "ASSIGNCOMMAND":
+         idChainNode, commandNode = node.children
+         self.compileCommand(commandNode)
+         self.emit(OP_STOREVAR, self.addName(idChainNode), node.lineno)
+      elif node.kind == "COMMANDCALL":
+         self.compileCommand(node.children[0])
+         self.emit(OP_POP, None, node.lineno)
+      elif node.kind == "IF":
+         self.compileExpression(node.children[0])
+         jumpFalse = self.emit(OP_JUMPIFFALSE, None, node.lineno)
+         self.compileStatement(node.children[1])
+         if len(node.children) == 3:
+            jumpEnd = self.emit(OP_JUMP, None, node.lineno)
+            self.patch(jumpFalse, len(self.code))
+            self.compileStatement(node.children[2])
+            self.patch(jumpEnd, len(self.code))
+         else:
+            self.patch(jumpFalse, len(self.code))
+
+   def compileCommand(self, commandNode):
       idChainNode, argListNode = commandNode.children
-      cmds.append([CMD_COMMANDCALL, commandNode])
-   elif node.kind == "IF":
-      if len(node.children) == 2:
-         exprNode, trueNode = node.children
-         trueCmds = toCommands(trueNode)
-         cmds.append([CMD_EVAL, exprNode])
-         cmds.append([CMD_IFFALSEGOTOREL, len(trueCmds)])
-         cmds += trueCmds
-      elif len(node.children) == 3:
-         exprNode, trueNode, falseNode = node.children
-         trueCmds = toCommands(trueNode)
-         falseCmds = toCommands(falseNode)
-         cmds.append([CMD_EVAL, exprNode])
-         cmds.append([CMD_IFFALSEGOTOREL, len(trueCmds)+1])
-         cmds += trueCmds
-         cmds.append([CMD_GOTOREL, len(falseCmds)])
-         cmds += falseCmds         
-
-   return cmds   
+      for argNode in argListNode.children:
+         self.compileExpression(argNode)
+      self.emit(OP_CALL, (self.addName(idChainNode), len(argListNode.children)), commandNode.lineno)
+
+   def compileExpression(self, node):
+      if node.kind in ("NUMBER", "STRING"):
+         self.emit(OP_PUSHCONST, self.addConst(node.leaf), node.lineno)
+      elif node.kind == "IDENTIFIER":
+         self.emit(OP_LOADVAR, self.addName(node), node.lineno)
+      elif node.kind == "PARENS":
+         self.compileExpression(node.children[0])
+      elif node.kind == "BINOP":
+         self.compileExpression(node.children[0])
+         self.compileExpression(node.children[1])
+         self.emit(OP_BINOP, BINOPINDEXES[node.leaf], node.lineno)
+
+def getChain(idChainNode):
+   #flatten an identifier chain into a tuple of names
+   chain = []
+   while True:
+      chain.append(idChainNode.leaf)
+      if not idChainNode.children:
+         return tuple(chain)
+      idChainNode = idChainNode.children[0]
+
+def toBytecode(node):
+   #returns (code, lines, consts, names)
+   #code is a list of (opcode, argument) instructions, and lines the source line of each one
+   #consts is the constant pool, and names the pool of identifier chains as tuples of names
+   compiler = Compiler()
+   compiler.compileStatement(node)
+   return compiler.code, compiler.lines, compiler.consts, compiler.names
+
+def getLocalNames(names):
+   #for each identifier chain, the local variable name if it's a single name, otherwise None
+   return [chain[0] if len(chain) == 1 else None for chain in names]
@@ -1,30 +1,72 @@
 import sys, traceback
+import time
 
-import script_yacc
 import script_compiler
 import symbols
 import script
+import script_error
+import script_cache
+import profiler
 from commands import *
 
 import globs
 import data
+import settings
+
+#how many instructions to run between checks of the time budget
+TIMECHECK_INTERVAL = 100
+
+class ScriptContext():
+   #a running script, with its own place in the script, value stack and local variables
+   def __init__(self, script, caller=None):
+      self.script = script
+      self.caller = caller
+      self.currentCmd = 0
+      self.stack = []
+      self.locals = {}
+      self.waitingFor = None
+      self.finished = False
+
+      #for the watchdog, how many instructions we've run since we last waited
+      self.sinceWait = 0
+      self.reported = False
+
+   def isReady(self):
+      #whether the context can run, clearing what it's waiting for if that's done
+      if self.waitingFor is not None:
+         if self.waitingFor.busy:
+            return False
+         self.waitingFor = None
+      return True
 
 class ScriptEngine():
    __shared_state = {}
-   
+
    def __init__(self):
       self.__dict__ = self.__shared_state
 
+      #instruction handlers, indexed by opcode
+      self.handlers = [self.op_pushConst,
+                       self.op_loadVar,
+                       self.op_storeVar,
+                       self.op_binop,
+                       self.op_call,
+                       self.op_pop,
+                       self.op_print,
+                       self.op_jump,
+                       self.op_jumpIfFalse]
+
    def setup(self, game):
       self.symbols = symbols.Symbols(game, self)
 
-      self.script = None
-      self.result = False
-      self.currentCmd = 0
+      #the running scripts, and the one currently executing
+      self.contexts = []
+      self.context = None
 
-      self.caller = None
-
-      self.waitingFor = None
+      #profiling is off unless turned on
+      self.profiler = None
+      if settings.scriptProfile:
+         self.enableProfiling()
 
       #determine behaviour scripts
       root = data.getTreeRoot(globs.BEHAVIOURS)
@@ -33,71 +75,259 @@ class ScriptEngine():
          i = data.getAttr(behaviourNode, "index", data.D_INT)
          s = data.getChild(behaviourNode, "script")
          self.behaviours[i] = script.Script(s, False)
-      
+      script_cache.flush()
+
    def run(self, script, caller=None):
-      self.script = script
-      self.currentCmd = 0
+      #start a script running alongside any others, and run it until it waits or uses its budget
+      #a script already running for the same caller isn't started again
+      for context in self.contexts:
+         if context.script is script and context.caller is caller:
+            return context
+      context = ScriptContext(script, caller)
+      self.contexts.append(context)
+      self.runBudgeted(context, settings.scriptBudget, time.time()+settings.scriptTimeBudget)
+      return context
 
-      self.caller = caller
+   def tick(self):
+      #share this frame's instruction and time budgets between the running scripts
+      #iterate over a copy, as scripts may start other scripts
+      remaining = settings.scriptFrameBudget
+      deadline = time.time()+settings.scriptTimeBudget
+      for context in self.contexts[:]:
+         if remaining <= 0 or time.time() >= deadline:
+            break
+         if not context.finished and context.isReady():
+            remaining -= self.runBudgeted(context, min(settings.scriptBudget, remaining), deadline)
 
-      self.waitingFor = None
+      #take turns at going first, so scripts at the end aren't starved when the budgets run out
+      if len(self.contexts) > 1:
+         self.contexts.append(self.contexts.pop(0))
+
+   def runBudgeted(self, context, budget, deadline):
+      #run a context for up to budget instructions, stopping early if the deadline passes
+      #anything left over is carried on next tick
+      count = 0
+      while count < budget and not context.finished and context.waitingFor is None:
+         count += self.execute(context, min(TIMECHECK_INTERVAL, budget-count))
+         if time.time() >= deadline:
+            break
 
-      self.executeScript()
+      #if the script's been running a long time without waiting, it may be stuck
+      if context.waitingFor is None:
+         context.sinceWait += count
+         if context.sinceWait > settings.scriptWatchdogLimit and not context.reported:
+            self.reportRunaway(context)
+      else:
+         context.sinceWait = 0
+      return count
+
+   def reportRunaway(self, context):
+      s = context.script
+      line = s.lines[min(context.currentCmd, len(s.lines)-1)]
+      print "Runaway script: %s, script %s, line %i has run %i instructions without waiting" % (s.fn, s.scriptId, line, context.sinceWait)
+      context.reported = True
+
+   def enableProfiling(self):
+      if self.profiler is None:
+         self.profiler = profiler.ScriptProfiler()
+      return self.profiler
+
+   def disableProfiling(self):
+      self.profiler = None
 
-   def executeScript(self):
-      while self.waitingFor is None:
+   def writeProfile(self):
+      #write out the profile if profiling, reporting rather than raising any error
+      #the engine may never have been set up, so the profiler may not exist
+      profiler = self.__dict__.get("profiler")
+      if profiler is not None:
          try:
-            cmd = self.script[self.currentCmd]
-            self.handleCommand(cmd)
-            self.currentCmd += 1
-         except IndexError:
-            self.script = None
+            profiler.write()
+         except (IOError, OSError) as e:
+            print "Couldn't write script profile: %s" % e
+
+   def getCaller(self):
+      if self.context is None:
+         return None
+      return self.context.caller
+
+   def waitFor(self, obj):
+      #stop the executing script until obj is no longer busy
+      self.context.waitingFor = obj
+
+   def isRunning(self):
+      return len(self.contexts) > 0
+
+   def execute(self, context, budget):
+      #run a context until it waits, finishes or has run budget instructions
+      #returns the number of instructions run
+      #contexts can be executed from within a command, so restore the previous one afterwards
+      #when profiling, use the slower loop which times every instruction
+      previous = self.context
+      self.context = context
+      try:
+         if self.profiler is None:
+            return self.executeContext(context, budget)
+         else:
+            return self.executeContextProfiled(context, budget)
+      finally:
+         self.context = previous
+
+   def executeContext(self, context, budget):
+      #keep everything the loop uses in locals, since attribute lookups are slow
+      code = context.script.code
+      end = len(code)
+      consts = context.script.consts
+      localNames = context.script.localNames
+      localVars = context.locals
+      stack = context.stack
+      push = stack.append
+      pop = stack.pop
+      handlers = self.handlers
+      pc = context.currentCmd
+      count = 0
+      while context.waitingFor is None and count < budget:
+         if pc >= end:
+            context.finished = True
+            self.contexts.remove(context)
             break
+         op, arg = code[pc]
+         pc += 1
+         count += 1
 
-   def handleCommand(self, cmd):
-      if cmd[0] == CMD_PRINT:
-         print cmd[1].evaluate(self.symbols)
-      elif cmd[0] == CMD_ASSIGN:
-         idChainNode = cmd[1]
-         exprNode = cmd[2]
-         self.symbols.setVar(idChainNode, exprNode.evaluate(self.symbols))
-      elif cmd[0] == CMD_COMMANDASSIGN:
-         idChainNode = cmd[1]
-         commandNode = cmd[2]
-         commandIdChainNode, argListNode = commandNode.children
-         argNodeList = argListNode.children
-         args = [argNode.evaluate(self.symbols) for argNode in argNodeList]
-         result = self.symbols.doCommand(commandIdChainNode, args)
-         self.symbols.setVar(idChainNode, result)
-      elif cmd[0] == CMD_EVAL:
-         exprNode = cmd[1]
-         self.result = exprNode.evaluate(self.symbols)
-      elif cmd[0] == CMD_GOTOREL:
-         self.currentCmd += cmd[1]
-      elif cmd[0] == CMD_IFFALSEGOTOREL:
-         if not self.result:
-            self.currentCmd += cmd[1]
-      elif cmd[0] == CMD_COMMANDCALL:
-         commandNode = cmd[1]
-         idChainNode, argListNode = commandNode.children
-         argNodeList = argListNode.children
-         args = [argNode.evaluate(self.symbols) for argNode in argNodeList]
-         self.symbols.doCommand(idChainNode, args)
-      else:
-         print "Unknown command"
+         #the commonest instructions are handled inline, the rest through the handler table
+         if op == OP_PUSHCONST:
+            push(consts[arg])
+         elif op == OP_LOADVAR and localVars.has_key(localNames[arg]):
+            push(localVars[localNames[arg]])
+         elif op == OP_STOREVAR and localNames[arg] is not None:
+            localVars[localNames[arg]] = pop()
+         elif op == OP_BINOP:
+            rhs = pop()
+            lhs = pop()
+            try:
+               push(BINOPFUNCTIONS[arg](lhs, rhs))
+            except TypeError:
+               push(lhs)
+               push(rhs)
+               context.currentCmd = pc
+               handlers[op](arg)
+         elif op == OP_JUMPIFFALSE:
+            if not pop():
+               pc = arg
+         elif op == OP_JUMP:
+            pc = arg
+         else:
+            context.currentCmd = pc
+            handlers[op](arg)
+            pc = context.currentCmd
+            localVars = context.locals
+      context.currentCmd = pc
+      return count
 
-   def processBehaviour(self, b):
+   def executeContextProfiled(self, context, budget):
+      #run every instruction through the handler table, timing each one
+      script = context.script
+      code = script.code
+      timer = profiler.timer
+      count = 0
+      while context.waitingFor is None and count < budget:
+         pc = context.currentCmd
+         if pc >= len(code):
+            context.finished = True
+            self.contexts.remove(context)
+            break
+         op, arg = code[pc]
+         context.currentCmd = pc+1
+         count += 1
+         start = timer()
+         self.handlers[op](arg)
+         self.profiler.record(script, script.lines[pc], op, timer()-start)
+      return count
+
+   def nameError(self, name):
+      #the instruction being run is the one before the current one
+      s = self.context.script
+      line = s.lines[self.context.currentCmd-1]
+      return script_error.DNameError(s.fn, s.scriptId, line, name)
+
+   def op_pushConst(self, arg):
+      self.context.stack.append(self.context.script.consts[arg])
+
+   def op_loadVar(self, arg):
+      chain = self.context.script.names[arg]
       try:
-         s = self.behaviours[b]
-         self.run(s)
-      except KeyError:
-         pass
+         if len(chain) == 1:
+            value = self.symbols.getLocal(chain[0])
+         else:
+            value = self.symbols.bind(self.context.script, arg).getVar()
+      except script_error.DLookupError as e:
+         raise self.nameError(e.name)
+      self.context.stack.append(value)
 
-   def tick(self):
-      if (self.script is not None):
-         if self.waitingFor is None:
-            self.executeScript()
+   def op_storeVar(self, arg):
+      chain = self.context.script.names[arg]
+      value = self.context.stack.pop()
+      try:
+         if len(chain) == 1:
+            self.context.locals[chain[0]] = value
          else:
-            if not self.waitingFor.busy:
-               self.waitingFor = None
-               self.executeScript()
+            self.symbols.bind(self.context.script, arg).setVar(value)
+      except script_error.DLookupError as e:
+         raise self.nameError(e.name)
+
+   def op_binop(self, arg):
+      stack = self.context.stack
+      rhs = stack.pop()
+      lhs = stack.pop()
+      symbol, function = BINOPS[arg]
+      try:
+         stack.append(function(lhs, rhs))
+      except TypeError:
+         if symbol == "+":
+            stack.append(str(lhs) + str(rhs))
+         else:
+            s = self.context.script
+            line = s.lines[self.context.currentCmd-1]
+            raise script_error.DOperatorError(s.fn, s.scriptId, line, symbol, lhs, rhs)
+
+   def op_call(self, arg):
+      nameIndex, argCount = arg
+      stack = self.context.stack
+      if argCount:
+         args = stack[-argCount:]
+         del stack[-argCount:]
+      else:
+         args = []
+      chain = self.context.script.names[nameIndex]
+      try:
+         if len(chain) == 1:
+            command = self.symbols.getCommand(chain[0])
+         else:
+            command = self.symbols.bind(self.context.script, nameIndex).getCommand()
+      except script_error.DLookupError as e:
+         raise self.nameError(e.name)
+
+      #when profiling, time the command separately
+      if self.profiler is None:
+         stack.append(command(*args))
+      else:
+         start = profiler.timer()
+         stack.append(command(*args))
+         self.profiler.recordCommand(".".join(chain), profiler.timer()-start)
+
+   def op_pop(self, arg):
+      self.context.stack.pop()
+
+   def op_print(self, arg):
+      print self.context.stack.pop()
+
+   def op_jump(self, arg):
+      self.context.currentCmd = arg
+
+   def op_jumpIfFalse(self, arg):
+      if not self.context.stack.pop():
+         self.context.currentCmd = arg
+
+   def processBehaviour(self, b):
+      if self.behaviours.has_key(b):
+         self.run(self.behaviours[b])
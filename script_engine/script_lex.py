@@ -1,3 +1,5 @@
+import sys
+
 import ply.lex as lex
 
 reserved = {"print" : "PRINT",
@@ -74,4 +76,25 @@ def t_error(t):
     print "Illegal character '%s'" % t.value[0]
     t.lexer.skip(1)
 
-lexer = lex.lex()
+#the prebuilt lexer table module, written by build_tables.py
+LEXTAB = "script_lextab"
+
+#the lexer, built on first use
+lexer = None
+
+def buildLexer(lextab=None, outputdir=""):
+   #with a table, the rules are read from it rather than validated and compiled
+   #a table is only written when it's given by name and can't be imported
+   if lextab is None:
+      return lex.lex(module=sys.modules[__name__])
+   return lex.lex(module=sys.modules[__name__], optimize=1, lextab=lextab, outputdir=outputdir)
+
+def getLexer():
+   global lexer
+   if lexer is None:
+      try:
+         import script_lextab as lextab
+      except ImportError:
+         lextab = None
+      lexer = buildLexer(lextab)
+   return lexer
@@ -0,0 +1,9 @@
+# script_lextab.py. This file automatically created by PLY (version 3.4). Don't edit!
+_tabversion   = '3.4'
+_lextokens    = {'NUMBER': 1, 'PRINT': 1, 'MINUS': 1, 'DOT': 1, 'RBRACE': 1, 'LE': 1, 'RPAREN': 1, 'SEMI': 1, 'LT': 1, 'COMMA': 1, 'PLUS': 1, 'STRING': 1, 'IDENTIFIER': 1, 'ASSIGN': 1, 'GT': 1, 'DIVIDE': 1, 'EQUALS': 1, 'TIMES': 1, 'GE': 1, 'LPAREN': 1, 'ENDIF': 1, 'ELSE': 1, 'IF': 1, 'LBRACE': 1}
+_lexreflags   = 0
+_lexliterals  = ''
+_lexstateinfo = {'INITIAL': 'inclusive'}
+_lexstatere   = {'INITIAL': [('(?P<t_NUMBER>\\d+)|(?P<t_STRING>\\".*\\")|(?P<t_IDENTIFIER>[a-zA-Z_][a-zA-Z0-9_]*)|(?P<t_newline>\\n+)|(?P<t_COMMENT>\\#.*)|(?P<t_LE><=)|(?P<t_PLUS>\\+)|(?P<t_DOT>\\.)|(?P<t_LPAREN>\\()|(?P<t_EQUALS>==)|(?P<t_GE>>=)|(?P<t_RPAREN>\\))|(?P<t_RBRACE>})|(?P<t_LT><)|(?P<t_COMMA>,)|(?P<t_ASSIGN>=)|(?P<t_DIVIDE>/)|(?P<t_LBRACE>{)|(?P<t_SEMI>;)|(?P<t_MINUS>-)|(?P<t_GT>>)', [None, ('t_NUMBER', 'NUMBER'), ('t_STRING', 'STRING'), ('t_IDENTIFIER', 'IDENTIFIER'), ('t_newline', 'newline'), ('t_COMMENT', 'COMMENT'), (None, 'LE'), (None, 'PLUS'), (None, 'DOT'), (None, 'LPAREN'), (None, 'EQUALS'), (None, 'GE'), (None, 'RPAREN'), (None, 'RBRACE'), (None, 'LT'), (None, 'COMMA'), (None, 'ASSIGN'), (None, 'DIVIDE'), (None, 'LBRACE'), (None, 'SEMI'), (None, 'MINUS'), (None, 'GT')])]}
+_lexstateignore = {'INITIAL': ' \t'}
+_lexstateerrorf = {'INITIAL': 't_error'}
@@ -0,0 +1,94 @@
+from commands import *
+
+import script_yacc
+
+#map from operator symbol to operator function
+BINOPDICT = dict(BINOPS)
+
+#the types a folded expression may have, and the kind of constant node each becomes
+CONSTKINDS = {int: "NUMBER",
+              long: "NUMBER",
+              bool: "NUMBER",
+              str: "STRING"}
+
+def countNodes(node):
+   return 1 + sum([countNodes(child) for child in node.children])
+
+def isConst(node):
+   return node.kind in ("NUMBER", "STRING")
+
+def makeConst(value, lineno):
+   if CONSTKINDS[type(value)] == "NUMBER":
+      return script_yacc.NumberNode("NUMBER", lineno, [], value)
+   return script_yacc.StringNode("STRING", lineno, [], value)
+
+def foldBinop(symbol, lhs, rhs):
+   #returns the folded value, or None if it has to be left for runtime
+   #operations which fail are left alone so the error is still raised with the script's line
+   try:
+      value = BINOPDICT[symbol](lhs, rhs)
+   except TypeError:
+      if symbol != "+":
+         return None
+      value = str(lhs) + str(rhs)
+   except ArithmeticError:
+      return None
+   if type(value) not in CONSTKINDS:
+      return None
+   return value
+
+def optimizeExpression(node):
+   #parentheses only group, so they can go once the tree is built
+   if node.kind == "PARENS":
+      return optimizeExpression(node.children[0])
+   elif node.kind == "BINOP":
+      node.children = [optimizeExpression(child) for child in node.children]
+      lhs, rhs = node.children
+      if isConst(lhs) and isConst(rhs):
+         value = foldBinop(node.leaf, lhs.leaf, rhs.leaf)
+         if value is not None:
+            return makeConst(value, node.lineno)
+   return node
+
+def optimizeStatement(node):
+   if node.kind == "STATEMENTLIST":
+      node.children = [optimizeStatement(child) for child in node.children]
+   elif node.kind in ("PRINT", "ASSIGN"):
+      node.children[-1] = optimizeExpression(node.children[-1])
+   elif node.kind in ("ASSIGNCOMMAND", "COMMANDCALL"):
+      commandNode = node.children[-1]
+      argListNode = commandNode.children[1]
+      argListNode.children = [optimizeExpression(child) for child in argListNode.children]
+   elif node.kind == "IF":
+      condition = optimizeExpression(node.children[0])
+      branches = [optimizeStatement(child) for child in node.children[1:]]
+
+      #if the condition is constant, only one branch can ever run
+      if isConst(condition):
+         if condition.leaf:
+            return branches[0]
+         elif len(branches) == 2:
+            return branches[1]
+         return script_yacc.Node("STATEMENTLIST", node.lineno, [])
+      node.children = [condition] + branches
+   return node
+
+def optimize(ast):
+   #fold constant expressions and remove branches which can't run
+   #returns the optimized AST and how many nodes were saved
+   before = countNodes(ast)
+   ast = optimizeStatement(ast)
+   return ast, before-countNodes(ast)
+
+def threadJumps(code):
+   #make jumps which land on an unconditional jump go straight to its target
+   #the seen set stops infinite loops of jumps from hanging the compiler
+   for i, (op, arg) in enumerate(code):
+      if op in (OP_JUMP, OP_JUMPIFFALSE):
+         target = arg
+         seen = set()
+         while target < len(code) and code[target][0] == OP_JUMP and target not in seen:
+            seen.add(target)
+            target = code[target][1]
+         code[i] = (op, target)
+   return code
@@ -1,5 +1,5 @@
 
-# parsetab.py
+# script_parsetab.py
 # This file is automatically generated. Do not edit.
 _tabversion = '3.2'
 
@@ -26,32 +26,32 @@ for _k, _v in _lr_goto_items.items():
 del _lr_goto_items
 _lr_productions = [
   ("S' -> statementlist","S'",1,None,None,None),
-  ('statementlist -> statement','statementlist',1,'p_statementlist','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',13),
-  ('statementlist -> statementlist statement','statementlist',2,'p_statementlist','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',14),
-  ('statementblock -> LBRACE statementlist RBRACE','statementblock',3,'p_statementblock','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',25),
-  ('statement -> IF expression statementblock ENDIF','statement',4,'p_statement_if','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',30),
-  ('statement -> IF expression statementblock ELSE statementblock ENDIF','statement',6,'p_statement_if','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',31),
-  ('statement -> PRINT expression SEMI','statement',3,'p_statement_print','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',41),
-  ('statement -> identifierchain ASSIGN expression SEMI','statement',4,'p_statement_assign','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',47),
-  ('statement -> identifierchain ASSIGN commandcall SEMI','statement',4,'p_statement_assigncommand','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',53),
-  ('statement -> commandcall SEMI','statement',2,'p_statement_commandcall','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',59),
-  ('commandcall -> identifierchain LPAREN expressionlist RPAREN','commandcall',4,'p_commandcall','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',65),
-  ('commandcall -> identifierchain LPAREN RPAREN','commandcall',3,'p_commandcall','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',66),
-  ('expressionlist -> expression','expressionlist',1,'p_expressionlist','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',76),
-  ('expressionlist -> expressionlist COMMA expression','expressionlist',3,'p_expressionlist','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',77),
-  ('expression -> expression PLUS expression','expression',3,'p_expression_binop','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',87),
-  ('expression -> expression MINUS expression','expression',3,'p_expression_binop','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',88),
-  ('expression -> expression TIMES expression','expression',3,'p_expression_binop','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',89),
-  ('expression -> expression DIVIDE expression','expression',3,'p_expression_binop','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',90),
-  ('expression -> expression EQUALS expression','expression',3,'p_expression_binop','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',91),
-  ('expression -> expression GT expression','expression',3,'p_expression_binop','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',92),
-  ('expression -> expression LT expression','expression',3,'p_expression_binop','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',93),
-  ('expression -> expression GE expression','expression',3,'p_expression_binop','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',94),
-  ('expression -> expression LE expression','expression',3,'p_expression_binop','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',95),
-  ('expression -> NUMBER','expression',1,'p_expression_num','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',100),
-  ('expression -> STRING','expression',1,'p_expression_string','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',104),
-  ('identifierchain -> IDENTIFIER','identifierchain',1,'p_identifierchain','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',109),
-  ('identifierchain -> IDENTIFIER DOT identifierchain','identifierchain',3,'p_identifierchain','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',110),
-  ('expression -> identifierchain','expression',1,'p_expression_identifier','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',119),
-  ('expression -> LPAREN expression RPAREN','expression',3,'p_expression_expr','C:\\Users\\User\\Documents\\Python\\Ditto\\script_engine\\script_yacc.py',124),
+  ('statementlist -> statement','statementlist',1,'p_statementlist','script_yacc.py',20),
+  ('statementlist -> statementlist statement','statementlist',2,'p_statementlist','script_yacc.py',21),
+  ('statementblock -> LBRACE statementlist RBRACE','statementblock',3,'p_statementblock','script_yacc.py',30),
+  ('statement -> IF expression statementblock ENDIF','statement',4,'p_statement_if','script_yacc.py',35),
+  ('statement -> IF expression statementblock ELSE statementblock ENDIF','statement',6,'p_statement_if','script_yacc.py',36),
+  ('statement -> PRINT expression SEMI','statement',3,'p_statement_print','script_yacc.py',46),
+  ('statement -> identifierchain ASSIGN expression SEMI','statement',4,'p_statement_assign','script_yacc.py',52),
+  ('statement -> identifierchain ASSIGN commandcall SEMI','statement',4,'p_statement_assigncommand','script_yacc.py',58),
+  ('statement -> commandcall SEMI','statement',2,'p_statement_commandcall','script_yacc.py',64),
+  ('commandcall -> identifierchain LPAREN expressionlist RPAREN','commandcall',4,'p_commandcall','script_yacc.py',70),
+  ('commandcall -> identifierchain LPAREN RPAREN','commandcall',3,'p_commandcall','script_yacc.py',71),
+  ('expressionlist -> expression','expressionlist',1,'p_expressionlist','script_yacc.py',81),
+  ('expressionlist -> expressionlist COMMA expression','expressionlist',3,'p_expressionlist','script_yacc.py',82),
+  ('expression -> expression PLUS expression','expression',3,'p_expression_binop','script_yacc.py',92),
+  ('expression -> expression MINUS expression','expression',3,'p_expression_binop','script_yacc.py',93),
+  ('expression -> expression TIMES expression','expression',3,'p_expression_binop','script_yacc.py',94),
+  ('expression -> expression DIVIDE expression','expression',3,'p_expression_binop','script_yacc.py',95),
+  ('expression -> expression EQUALS expression','expression',3,'p_expression_binop','script_yacc.py',96),
+  ('expression -> expression GT expression','expression',3,'p_expression_binop','script_yacc.py',97),
+  ('expression -> expression LT expression','expression',3,'p_expression_binop','script_yacc.py',98),
+  ('expression -> expression GE expression','expression',3,'p_expression_binop','script_yacc.py',99),
+  ('expression -> expression LE expression','expression',3,'p_expression_binop','script_yacc.py',100),
+  ('expression -> NUMBER','expression',1,'p_expression_num','script_yacc.py',105),
+  ('expression -> STRING','expression',1,'p_expression_string','script_yacc.py',109),
+  ('identifierchain -> IDENTIFIER','identifierchain',1,'p_identifierchain','script_yacc.py',114),
+  ('identifierchain -> IDENTIFIER DOT identifierchain','identifierchain',3,'p_identifierchain','script_yacc.py',115),
+  ('expression -> identifierchain','expression',1,'p_expression_identifier','script_yacc.py',124),
+  ('expression -> LPAREN expression RPAREN','expression',3,'p_expression_expr','script_yacc.py',129),
 ]
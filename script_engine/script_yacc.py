@@ -1,5 +1,8 @@
+import sys
+
 import ply.yacc as yacc
 
+import script_lex
 from script_lex import tokens
 import script_error
 
@@ -60,7 +63,7 @@ def p_statement_commandcall(p):
    """
    statement : commandcall SEMI
    """
-   p[0] = Node("COMMANDCALL", p.lineno(1), [p[1]])
+   p[0] = Node("COMMANDCALL", p[1].lineno, [p[1]])
 
 def p_commandcall(p):
    """
@@ -68,10 +71,10 @@ def p_commandcall(p):
                | identifierchain LPAREN RPAREN
    """
    if len(p) == 5:      
-      p[0] = Node("COMMAND", p.lineno(1), [p[1], p[3]])
+      p[0] = Node("COMMAND", p[1].lineno, [p[1], p[3]])
    elif len(p) == 4:
-      exprlistNode = Node("EXPRESSIONLIST", p.lineno(1), [])
-      p[0] = Node("COMMAND", p.lineno(1), [p[1], exprlistNode])
+      exprlistNode = Node("EXPRESSIONLIST", p[1].lineno, [])
+      p[0] = Node("COMMAND", p[1].lineno, [p[1], exprlistNode])
 
 def p_expressionlist(p):
    """
@@ -127,6 +130,8 @@ def p_expression_expr(p):
     p[0] = ParensNode("PARENS", p.lineno(1), [p[2]])
 
 def p_error(p):
+    if p is None:
+       raise script_error.DSyntaxError(CURRENTFILE, CURRENTSCRIPT, script_lex.getLexer().lineno, "end of script")
     raise script_error.DSyntaxError(CURRENTFILE, CURRENTSCRIPT, p.lineno, p.value)
 
 class Node():
@@ -152,12 +157,10 @@ class Node():
             print child.kind, child.children, child.leaf
 
 class NumberNode(Node):
-   def evaluate(self, symbols):
-      return self.leaf
+   pass
 
 class StringNode(Node):
-   def evaluate(self, symbols):
-      return self.leaf
+   pass
 
 class IdentifierNode(Node):
    def __init__(self, kind, lineno, children, leaf, fn, scriptId):
@@ -165,48 +168,41 @@ class IdentifierNode(Node):
 
       self.fn = fn
       self.scriptId = scriptId
-   
-   def evaluate(self, symbols):
-      return symbols.getVar(self)
 
 class BinopNode(Node):
-   def evaluate(self, symbols):
-      lhs = self.children[0].evaluate(symbols)
-      rhs = self.children[1].evaluate(symbols)
-      try:
-         if self.leaf == "+":
-            return lhs + rhs
-         elif self.leaf == "-":
-            return lhs - rhs
-         elif self.leaf == "*":
-           return lhs * rhs
-         elif self.leaf == "/":
-            return lhs / rhs
-         elif self.leaf == "==":
-            return (lhs == rhs)
-         elif self.leaf == ">":
-            return (lhs > rhs)
-         elif self.leaf == "<":
-            return (lhs < rhs)
-         elif self.leaf == ">=":
-            return (lhs >= rhs)
-         elif self.leaf == "<=":
-            return (lhs <= rhs)
-      except TypeError:
-         if self.leaf == "+":
-            return str(lhs) + str(rhs)
-         raise script_error.DOperatorError(CURRENTFILE, CURRENTSCRIPT, self.lineno, self.leaf, lhs, rhs)
+   pass
 
 class ParensNode(Node):
-   def evaluate(self, symbols):
-      return self.children[0].evaluate(symbols)
+   pass
 
-def parse(s, fn, scriptId):
+def parse(s, fn, scriptId, lineno=1):
    global CURRENTFILE
    global CURRENTSCRIPT
    CURRENTFILE = fn
    CURRENTSCRIPT = scriptId
-   return parser.parse(s)
+   lexer = script_lex.getLexer()
+   lexer.lineno = lineno
+   return getParser().parse(s, lexer=lexer)
+
+#the prebuilt parser table module, written by build_tables.py
+PARSETAB = "script_parsetab"
 
-parser = yacc.yacc()
+#the parser, built on first use
+parser = None
+
+def buildParser(tabmodule=PARSETAB, outputdir=""):
+   #tables are only written when an output directory is given, and never a debug file
+   #if the tables are missing or out of date they're generated in memory
+   return yacc.yacc(module=sys.modules[__name__], tabmodule=tabmodule, outputdir=outputdir,
+                    write_tables=bool(outputdir), debug=False)
+
+def getParser():
+   global parser
+   if parser is None:
+      try:
+         import script_parsetab as tabmodule
+      except ImportError:
+         tabmodule = PARSETAB
+      parser = buildParser(tabmodule)
+   return parser
 
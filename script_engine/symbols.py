@@ -4,12 +4,38 @@ import pokemon
 import dialog
 import sprite
 
+class Binding():
+   #an identifier chain of two or more names, resolved down to the object holding the last name
+   #only valid while the chain's root object is the same, and hasn't invalidated its bindings
+   def __init__(self, root, target, name):
+      self.root = root
+      self.generation = getattr(root, "scriptGeneration", 0)
+      self.target = target
+      self.name = name
+      self.command = None
+
+   def isValid(self, root):
+      return (root is self.root) and (getattr(root, "scriptGeneration", 0) == self.generation)
+
+   def getVar(self):
+      return self.target.getVar(self.name)
+
+   def setVar(self, val):
+      self.target.setVar(self.name, val)
+
+   def getCommand(self):
+      if self.command is None:
+         try:
+            self.command = self.target.scriptCommands[self.name]
+         except KeyError:
+            raise script_error.DLookupError(self.name)
+      return self.command
+
 class Symbols():
    def __init__(self, game, scriptEngine):
       self.game = game
       self.scriptEngine = scriptEngine
       
-      self.locals = {}
       self.commands = {"foo": self.command_foo,
                        "lock": self.command_lock,
                        "unlock": self.command_unlock,
@@ -17,60 +43,50 @@ class Symbols():
                        "dialog": self.command_dialog,
                        "generatePokemon": self.command_generatePokemon}
 
+      #functions to get each of the root objects identifier chains can start from
+      self.roots = {"PLAYER": lambda: self.game.player,
+                    "CALLER": self.scriptEngine.getCaller,
+                    "MAP": lambda: self.game.player.map,
+                    "SAVE": lambda: self.game.savegame}
+
    def getObject(self, objName):
-      if objName == "PLAYER":
-         return self.game.player
-      elif objName == "CALLER":
-         return self.scriptEngine.caller
-      elif objName == "MAP":
-         return self.game.player.map
-      elif objName == "SAVE":
-         return self.game.savegame
-      else:
-         raise script_error.DNameError("FILE", "SCRIPT", 0, objName)
+      try:
+         getRoot = self.roots[objName]
+      except KeyError:
+         raise script_error.DLookupError(objName)
+      obj = getRoot()
+      if obj is None:
+         raise script_error.DLookupError(objName)
+      return obj
 
-   def getVar(self, idChainNode):
-      if idChainNode.children:
-         nextNode = idChainNode.children[0]
-         try:
-            obj = self.getObject(idChainNode.leaf)
-         except script_error.DLookupError as e:
-            raise script_error.DNameError(idChainNode.fn, idChainNode.scriptId, idChainNode.lineno, e.name)
-         try:
-            return obj.getVarFromNode(nextNode)
-         except script_error.DLookupError as e:
-            raise script_error.DNameError(idChainNode.fn, idChainNode.scriptId, idChainNode.lineno, e.name)
-      else:
-         try:
-            return self.locals[idChainNode.leaf]
-         except KeyError:
-            raise script_error.DNameError("FILE", "SCRIPT", 0, idChainNode.leaf)
+   def resolve(self, chain):
+      root = self.getObject(chain[0])
+      target = root
+      for name in chain[1:-1]:
+         target = target.getObject(name)
+      return Binding(root, target, chain[-1])
 
-   def setVar(self, idChainNode, val):
-      if idChainNode.children:
-         nextNode = idChainNode.children[0]
-         obj = self.getObject(idChainNode.leaf)
-         obj.setVarFromNode(nextNode, val)
-      else:
-         self.locals[idChainNode.leaf] = val
+   def bind(self, script, i):
+      #get the binding for a script's identifier chain, resolving it again if it's no longer valid
+      #so repeated accesses only have to check the root object
+      binding = script.bindings[i]
+      if (binding is None) or not binding.isValid(self.getObject(script.names[i][0])):
+         binding = self.resolve(script.names[i])
+         script.bindings[i] = binding
+      return binding
 
-   def doCommand(self, idChainNode, args=[]):
-      if idChainNode.children:
-         nextNode = idChainNode.children[0]
-         try:
-            obj = self.getObject(idChainNode.leaf)
-         except script_error.DLookupError as e:
-            raise script_error.DNameError(idChainNode.fn, idChainNode.scriptId, idChainNode.lineno, e.name)
-         try:
-            return obj.doCommand(nextNode, args)
-         except script_error.DLookupError as e:
-            raise script_error.DNameError(idChainNode.fn, idChainNode.scriptId, idChainNode.lineno, e.name)            
-      else:
-         try:
-            command = self.commands[idChainNode.leaf]
-         except KeyError:
-            raise script_error.DNameError("FILE", "SCRIPT", 0, idChainNode.leaf)
-         return command(*args)
+   def getLocal(self, name):
+      #local variables belong to the executing script
+      try:
+         return self.scriptEngine.context.locals[name]
+      except KeyError:
+         raise script_error.DLookupError(name)
+
+   def getCommand(self, name):
+      try:
+         return self.commands[name]
+      except KeyError:
+         raise script_error.DLookupError(name)
 
    def command_foo(self, *args):
       if args:
@@ -81,36 +97,37 @@ class Symbols():
    def command_lock(self):
       self.game.player.lock()
       try:
-         self.scriptEngine.caller.lock()
+         self.scriptEngine.getCaller().lock()
       except AttributeError:
          pass
 
    def command_unlock(self):
       self.game.player.unlock()
       try:
-         self.scriptEngine.caller.unlock()
+         self.scriptEngine.getCaller().unlock()
       except AttributeError:
          pass
 
    def command_facePlayer(self):
-      difference = (self.game.player.position[0]-self.scriptEngine.caller.position[0],
-                    self.game.player.position[1]-self.scriptEngine.caller.position[1])
+      caller = self.scriptEngine.getCaller()
+      difference = (self.game.player.position[0]-caller.position[0],
+                    self.game.player.position[1]-caller.position[1])
       if difference == (0, -1): #if player is above caller
-         self.scriptEngine.caller.direction = sprite.DIR_UP
+         caller.direction = sprite.DIR_UP
       elif difference == (0, 1): #if player is below caller
-         self.scriptEngine.caller.direction = sprite.DIR_DOWN
+         caller.direction = sprite.DIR_DOWN
       elif difference == (-1, 0): #if player is to left of caller
-         self.scriptEngine.caller.direction = sprite.DIR_LEFT
+         caller.direction = sprite.DIR_LEFT
       elif difference == (1, 0): #if player is to right of caller
-         self.scriptEngine.caller.direction = sprite.DIR_RIGHT
+         caller.direction = sprite.DIR_RIGHT
 
    def command_dialog(self, text, last=False):
       d = dialog.Dialog(text, self.game.screen, not last)
       self.game.foregroundObject = d
-      self.scriptEngine.waitingFor = d      
+      self.scriptEngine.waitFor(d)
 
    def command_generatePokemon(self, species, level):
       return pokemon.Pokemon(species, level)
 
    def flushLocals(self):
-      self.locals = {}
+      self.scriptEngine.context.locals = {}
@@ -217,7 +217,7 @@ class ScriptEngine():
                sound.playMusic(p.map.music)
             else:
                p = self.game.player
-               mMap = tilemap.Tilemap(cmd[1], self)
+               mMap = tilemap.getMap(cmd[1])
                p.transferTo(mMap, cmd[2])
                p.destination = p.getPositionInFront()
                p.level = cmd[3]
@@ -7,10 +7,29 @@ DEBUG = False
 screenSize = 19,15
 
 framerate = 22
+dirtyRects = False #only update the parts of the screen that change, skipping unchanged frames
+rleAccel = True #run length encode transparent images, faster to draw but slower to change
+
+scriptOptimizeReport = False #print how many AST nodes optimization saved as each script is compiled
+scriptProfile = False #record instruction counts and times for each script, line and command
+scriptProfilePath = "script_profile" #where the profile is written, on the debug key and at exit
+
+scriptDump = False #write the AST and bytecode of every compiled script to scriptDumpPath
+scriptDumpIds = [] #ids of scripts to dump even when scriptDump is off
+scriptDumpPath = "script_dump"
+scriptDumpAsync = False #write dumps on a worker thread
 textSpeed = "SLOW"
+scriptBudget = 1000 #instructions each running script may run per frame
+scriptFrameBudget = 5000 #instructions all running scripts together may run per frame
+scriptTimeBudget = 0.005 #seconds all running scripts together may run for per frame
+scriptWatchdogLimit = 100000 #instructions a script may run without waiting before it's reported as a runaway
 
 music = True
+musicFade = 0.5 #seconds to fade music out and in over when changing track
 soundEffects = True
+soundEffectsPreload = True #decode every sound effect at startup, rather than when each first plays
+soundEffectsBudget = 4*1024*1024 #bytes of decoded sound effects to keep loaded
+soundEffectsPolyphony = 1 #how many of the same effect may play at once, unless the effect sets its own
 
 path = "C:\\Users\\User\\Documents\\Python\\Ditto\\Gen3game"
 
@@ -1,4 +1,5 @@
 import threading
+import time
 import os
 import xml.etree.ElementTree as ET
 
@@ -20,11 +21,19 @@ SOUNDEFFECTS = {"SAVE": SD_SAVE,
                 "SELECT": SD_SELECT,
                 "CHOOSE": SD_CHOOSE}
 
-#initialise dictionary for mapping effects to sound files
+#how often the music worker checks on a fading or finishing track, in seconds
+MUSIC_POLL = 0.05
+
+#how many steps to fade music in over
+MUSIC_FADESTEPS = 10
+
+#initialise dictionaries for mapping effects to sound files, and to how many of each may play at once
 effects = {}
+polyphony = {}
 
-#initialise dictionary to hold playing effects
-currentEffects = {}
+#cache of decoded effects, created when the mixer is initialised
+#each entry is (sound, list of channels it's been played on), so an effect's voices go with its sound
+effectCache = None
 
 def init(fn):
    """
@@ -33,45 +42,262 @@ def init(fn):
    fn - the path to the XML file.
    """
 
-   #initialise the pygame mixer
+   global effectCache
+
+   #initialise the pygame mixer, and the cache of decoded effects
    pygame.mixer.init()
+   effectCache = data.ResourceCache(settings.soundEffectsBudget)
 
    #parse the XML file
    root = data.getTreeRoot(fn)
    for effect in data.getChildren(root, "soundeffect"):
       e = SOUNDEFFECTS[data.getAttr(effect, "name", data.D_STRING)]
       effects[e] = os.path.join(settings.path, "data", data.getAttr(effect, "file", data.D_STRING))
+      polyphony[e] = data.getOptionalAttr(effect, "polyphony", data.D_INT, settings.soundEffectsPolyphony)
 
-def playMusic(fn):
+   #decode the effects now unless they're to be loaded as they're needed
+   #so there's no loading when an effect first plays in response to input
+   if settings.soundEffects and settings.soundEffectsPreload:
+      for e in effects:
+         getEffect(e)
+
+def getEffect(effect):
    """
-   Play a music track.
+   Get the decoded sound for an effect and the channels it's playing on, loading it if it isn't cached.
 
-   fn - the path to the track.
+   Returns (sound, list of channels).
+
+   effect - the effect to get.
    """
 
-   #if music is enabled, start a thread to play the music
-   #music loading is slow, but not needed instantly so threading is a good idea
-   #especially as it usually happens at processing bottleneck frames like map transfers
-   if settings.music:
-      t = threading.Thread(target=threadPlayMusic, args=(fn,))
-      t.start()
+   #try the cache first
+   entry = effectCache.get(effect)
+   if entry is not None:
+      return entry
+
+   #decode the effect and cache it with no voices yet, sized by its decoded sample data
+   sound = pygame.mixer.Sound(effects[effect])
+   frequency, sampleFormat, channels = pygame.mixer.get_init()
+   size = int(sound.get_length()*frequency*channels*(abs(sampleFormat)/8))
+   entry = (sound, [])
+   effectCache.put(effect, entry, size)
+   return entry
 
-def threadPlayMusic(fn):
+class MusicManager():
    """
-   Function to be called by playMusic, to run in a separate thread.
+   Class to load and play music tracks on a single worker thread.
+
+   Requesting the track already playing does nothing, and if several requests come in
+   before the worker gets to them, only the latest is loaded.
+   A track waiting to load, or fading in, is dropped as soon as a newer one is requested.
 
-   fn - path to the music file to load.
+   pygame only streams one music track at a time, so switching tracks fades the old one out
+   before fading the new one in, rather than truly crossfading.
+
+   Borg singleton, so every instance shares the same worker and state.
    """
 
-   #load the music and play it on loop
-   pygame.mixer.music.load(fn)
-   pygame.mixer.music.play(-1)
+   #borg singleton
+   __shared_state = {"worker": None,
+                     "lock": threading.Condition(),
+                     "wanted": None,
+                     "queued": [],
+                     "playing": None,
+                     "requests": 0,
+                     "loads": 0,
+                     "deduped": 0,
+                     "coalesced": 0,
+                     "cancelled": 0,
+                     "failed": 0,
+                     "lastLatency": 0.0,
+                     "totalLatency": 0.0,
+                     "maxLatency": 0.0}
+
+   def __init__(self):
+      """Get the shared state."""
+
+      self.__dict__ = self.__shared_state
+
+   def play(self, fn, loop=True):
+      """
+      Switch to a music track, clearing any queued tracks.
+
+      fn - the path to the track.
+      loop - whether to play the track on loop.
+      """
+
+      with self.lock:
+         self.requests += 1
+         del self.queued[:]
+
+         #if the track is already wanted, or still playing with nothing else wanted, there's nothing to do
+         #a track that doesn't loop may have ended, in which case it's played again
+         if self.wanted is not None:
+            if self.wanted[:2] == (fn, loop):
+               self.deduped += 1
+               return
+            self.coalesced += 1
+         elif self.playing == (fn, loop) and pygame.mixer.music.get_busy():
+            self.deduped += 1
+            return
+
+         #replace any request the worker hasn't got to yet
+         self.wanted = (fn, loop, time.time())
+         self.startWorker()
+         self.lock.notifyAll()
+
+   def queue(self, fn, loop=False):
+      """
+      Queue a music track to play when the current one ends.
+
+      A looping track never ends, so only tracks played without looping are followed by queued ones.
+
+      fn - the path to the track.
+      loop - whether to play the track on loop.
+      """
+
+      with self.lock:
+         self.requests += 1
+         self.queued.append((fn, loop))
+         self.startWorker()
+         self.lock.notifyAll()
+
+   def startWorker(self):
+      """Start the worker if it isn't running. Called with the lock held."""
+
+      if self.worker is None:
+         self.worker = threading.Thread(target=self.work)
+         self.worker.daemon = True
+         self.worker.start()
+
+   def isSuperseded(self):
+      """Find out whether a newer track has been requested. Called with the lock held."""
+
+      return self.wanted is not None
+
+   def work(self):
+      """Play requested and queued tracks forever. Run on the worker thread."""
+
+      while True:
+         #wait for a request, or for the current track to end if there's one queued behind it
+         with self.lock:
+            while self.wanted is None and not (self.queued and not pygame.mixer.music.get_busy()):
+               if self.queued:
+                  self.lock.wait(MUSIC_POLL)
+               else:
+                  self.lock.wait()
+            if self.wanted is not None:
+               fn, loop, requested = self.wanted
+               self.wanted = None
+            else:
+               fn, loop = self.queued.pop(0)
+               requested = time.time()
+
+            #if it's already playing, it may have been requested again while another was waiting
+            current = self.playing
+            if current == (fn, loop) and pygame.mixer.music.get_busy():
+               self.deduped += 1
+               continue
+
+            #the current track's being replaced, so later requests for it mustn't be dropped as duplicates
+            self.playing = None
+
+         self.switchTo(fn, loop, requested, current is not None)
+
+   def switchTo(self, fn, loop, requested, fade):
+      """
+      Fade out the current track and fade in a new one. Run on the worker thread.
+
+      fn - the path to the track.
+      loop - whether to play the track on loop.
+      requested - the time the track was requested.
+      fade - whether there's a current track to fade out.
+      """
+
+      #fade out the current track, waiting until it's silent
+      fadeTime = settings.musicFade
+      if fade and fadeTime > 0:
+         pygame.mixer.music.fadeout(int(fadeTime*1000))
+         end = time.time()+fadeTime
+         while pygame.mixer.music.get_busy() and time.time() < end:
+            time.sleep(MUSIC_POLL)
+
+      #if a newer track's been requested while fading, don't bother loading this one
+      with self.lock:
+         if self.isSuperseded():
+            self.cancelled += 1
+            return
+
+      #load the track, reporting rather than raising any error so the worker keeps running
+      try:
+         pygame.mixer.music.load(fn)
+      except pygame.error as e:
+         print "Couldn't load music %s: %s" % (fn, e)
+         with self.lock:
+            self.failed += 1
+         return
+
+      #start it playing, quietly if it's to fade in, and record how long it took
+      if fadeTime > 0:
+         pygame.mixer.music.set_volume(0.0)
+      else:
+         pygame.mixer.music.set_volume(1.0)
+      if loop:
+         pygame.mixer.music.play(-1)
+      else:
+         pygame.mixer.music.play()
+      with self.lock:
+         self.playing = (fn, loop)
+         self.loads += 1
+         self.lastLatency = time.time()-requested
+         self.totalLatency += self.lastLatency
+         self.maxLatency = max(self.maxLatency, self.lastLatency)
+
+      #fade it in, stopping if a newer track is requested
+      if fadeTime > 0:
+         for i in range(1, MUSIC_FADESTEPS+1):
+            with self.lock:
+               if self.isSuperseded():
+                  return
+            time.sleep(fadeTime/MUSIC_FADESTEPS)
+            pygame.mixer.music.set_volume(float(i)/MUSIC_FADESTEPS)
+
+   def getStats(self):
+      """Return a dictionary of music statistics, with load latencies in seconds."""
+
+      with self.lock:
+         stats = {"requests": self.requests,
+                  "loads": self.loads,
+                  "deduped": self.deduped,
+                  "coalesced": self.coalesced,
+                  "cancelled": self.cancelled,
+                  "failed": self.failed,
+                  "queued": len(self.queued)}
+         if self.loads:
+            stats["lastLatency"] = self.lastLatency
+            stats["meanLatency"] = self.totalLatency/self.loads
+            stats["maxLatency"] = self.maxLatency
+         return stats
+
+def playMusic(fn):
+   """
+   Play a music track on loop.
+
+   Loading is done by the music manager's worker thread, as it's slow but not needed instantly,
+   and usually happens at processing bottleneck frames like map transfers.
+
+   fn - the path to the track.
+   """
+
+   #if music is enabled, ask the music manager to play it
+   if settings.music:
+      MusicManager().play(fn)
 
 def playEffect(effect):
    """
    Play a sound effect.
 
-   Checks to see whether the effect is currently playing, and won't play again if so.
+   Won't play the effect if as many of it as its polyphony allows are already playing.
 
    effect - the effect to play.
    """
@@ -79,14 +305,20 @@ def playEffect(effect):
    #if sound effects are enabled, then start doing stuff
    if settings.soundEffects:
 
-      #make a list of keys for effects that have finished playing and delete them
-      keys = [k for k in currentEffects if not currentEffects[k].get_busy()]
-      for key in keys:
-         del(currentEffects[key])
+      #keep only the channels still playing this effect
+      #a finished channel may have been reused for another sound, so check what it's playing
+      sound, channels = getEffect(effect)
+      channels[:] = [c for c in channels if c.get_busy() and c.get_sound() is sound]
+
+      #if there's room for another of the effect, play it
+      if len(channels) < polyphony[effect]:
+         channel = sound.play()
+         if channel is not None:
+            channels.append(channel)
+
+def getEffectStats():
+   """Return a dictionary of sound effect cache statistics."""
 
-      #if the requested effect is not already playing, play it   
-      if effect not in currentEffects:
-         channel = pygame.mixer.Sound(effects[effect]).play()
-         currentEffects[effect] = channel
+   return effectCache.getStats()
 
 
@@ -262,6 +262,11 @@ class Sprite(objects.VisibleObject):
    def walkForward(self, force=False, isPlayer=False):
       self.walk(self.direction, force, isPlayer)
 
+   def unload(self):
+      """Release the sprite's tileset, when the sprite is no longer going to be used."""
+
+      self.tileset.release()
+
    def setStatus(self, status):
       self.status = status
       self.tileset = self.statusTilesets[status]
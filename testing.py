@@ -9,3 +9,28 @@ def timeFunction(func, args=None):
    t2 = time.clock()
    print "-- Finished testing --"
    print "Function took %f secs to execute" % (t2-t1)
+
+def checkMaskEqual(layer, value):
+   """
+   Check a layer's equality mask against reading each tile, printing any mismatches.
+
+   Animated tiles are skipped, as the mask ignores animations.
+   Returns whether the mask was correct.
+
+   layer - the layer to check.
+   value - the tile index to mask.
+   """
+
+   mask = layer.maskEqual(value)
+   width, height = layer.size
+   ok = len(mask) == width*height
+   if not ok:
+      print "Mask is %i long, expected %i" % (len(mask), width*height)
+   for y in range(0, height):
+      for x in range(0, width):
+         if layer.animations.has_key((x, y)) or (y*width)+x >= len(mask):
+            continue
+         if mask[(y*width)+x] != (layer[(x, y)] == value):
+            print "Mask wrong at %s" % str((x, y))
+            ok = False
+   return ok
@@ -1,6 +1,16 @@
 import os
+import sys
+import struct
+import marshal
+import array
 import xml.etree.ElementTree as ET
 
+#numpy is optional, and only used to speed up bulk layer operations
+try:
+   import numpy
+except ImportError:
+   numpy = None
+
 import settings
 import tileset
 import sprite
@@ -11,6 +21,7 @@ import error
 import data
 import globs
 import sound
+import map_prefetch
 
 #initialise constants
 BD_NW = 0
@@ -18,8 +29,59 @@ BD_NE = 1
 BD_SW = 2
 BD_SE = 3
 
+#baked map file constants
+BAKED_EXT = ".dmap"
+BAKED_MAGIC = "DMAP"
+BAKED_VERSION = 1
+BAKED_HEADER = "<4sHI" #magic, version, length of the marshalled metadata
+
+#approximate number of bytes of recently visited maps to keep loaded
+MAPCACHE_BUDGET = 8*1024*1024
+
+#approximate number of bytes to count for each sprite on a map
+SPRITE_SIZE = 1024
+
+def getBakedPath(fn):
+   """
+   Return the path of the baked binary file for a map XML file.
+
+   fn - the path to the map XML file.
+   """
+
+   return os.path.splitext(fn)[0]+BAKED_EXT
+
+def describeNode(node):
+   """
+   Convert an XML node and its children into nested (tag, attributes, children) tuples.
+
+   Used to store NPC, script and warp nodes in baked map files.
+
+   node - the node to convert.
+   """
+
+   return (node.tag, dict(node.attrib), [describeNode(c) for c in node])
+
+def buildNode(description, fn):
+   """
+   Rebuild an XML node from the tuples created by describeNode.
+
+   description - the (tag, attributes, children) tuple.
+   fn - the filename to attach to the node for error reporting.
+   """
+
+   tag, attrib, children = description
+   node = ET.Element(tag, attrib)
+   node.ditto_fn = fn
+   for c in children:
+      node.append(buildNode(c, fn))
+   return node
+
 class Layer():
-   """Class to represent a single layer of a map."""
+   """
+   Class to represent a single layer of a map.
+
+   Tiles are stored in a flat typed array, row by row, so tile (x,y) is at index y*width+x.
+   """
    
    def __init__(self):
       """
@@ -27,7 +89,8 @@ class Layer():
       """
 
       #create initial tile array and animation dictionary for walkonto animations 
-      self.array = []
+      self.array = array.array("h")
+      self.size = (0, 0)
       self.animations = {}
 
    def openTMXNode(self, layerNode):
@@ -55,19 +118,43 @@ class Layer():
       #get hold of the data
       data = layerNode.find("data")
 
-      #if it's csv encoded, simply split into lines,
-      #and split each line into tiles which can be added to the array
+      #if it's csv encoded, count the rows to get the height,
+      #then split the whole text into tiles which can be added to the array in one go
       if data.attrib["encoding"] == "csv":
-         lines = data.text.split("\n")
-         for line in lines:
-            if line != "":
-               listed = line.split(",")
-               listed = filter(lambda a: a != "", listed) #remove any blank elements
-               row = map(lambda a: int(a)-1, listed) #TMX indexes start at 1, we start at 0
-               self.array.append(row)
+         text = data.text.strip()
+         height = len([line for line in text.split("\n") if line.strip() != ""])
+         listed = [a for a in text.replace("\n", ",").split(",") if a.strip() != ""] #remove any blank elements
+         self.array = array.array("h", [int(a)-1 for a in listed]) #TMX indexes start at 1, we start at 0
+         if height > 0:
+            self.size = len(self.array)/height, height
       else:
          raise error.DittoUnsupportedException("Unknown TMX file", "TMX layer encoding", data.attrib["encoding"])
 
+   def openPlane(self, level, size, plane):
+      """
+      Use a flat array of tile indexes from a baked map file to create the layer data.
+
+      level - the level of the layer.
+      size - the width and height of the layer.
+      plane - an array of tile indexes, stored row by row.
+      """
+
+      #the plane is already in our format, so just take it
+      self.level = level
+      self.size = tuple(size)
+      self.array = plane
+
+   def asNumpy(self):
+      """
+      Return a 2D numpy view of the tile array, indexed [y][x], or None if numpy isn't available.
+
+      The view shares memory with the layer, so changing it changes the layer.
+      """
+
+      if numpy is None:
+         return None
+      return numpy.frombuffer(self.array, dtype=numpy.int16).reshape(self.size[1], self.size[0])
+
    def offsetElements(self, i):
       """
       Subtract an amount from each element in the tile array.
@@ -77,12 +164,87 @@ class Layer():
       i - the amount to subtract
       """
 
-      #iterate over each tile and subtract
+      #subtract from each tile
       #if the value is -1, indicating a blank tile, leave it as that
-      for y in range(0, len(self.array)):
-         for x in range(0, len(self.array[0])):
-            if self.array[y][x] != -1:
-               self.array[y][x] -= i
+      if numpy is not None:
+         view = self.asNumpy()
+         view[view != -1] -= i
+      else:
+         self.array = array.array("h", [t-i if t != -1 else t for t in self.array])
+
+   def getTile(self, position):
+      """
+      Returns the tile at the position given, ignoring any animation.
+
+      position - the x,y position coordinate to get.
+      """
+
+      return self.array[(position[1]*self.size[0])+position[0]]
+
+   def getRegion(self, origin, size, fill=-1):
+      """
+      Return a rectangle of tiles as a flat array, row by row.
+
+      Any part of the rectangle off the layer is filled. Animations are ignored.
+
+      origin - the x,y position of the top left of the region.
+      size - the width and height of the region.
+      fill - the value to use for tiles off the layer.
+      """
+
+      #work out the part of each row that's on the layer, and how much fill goes either side of it
+      #if the region is entirely off one side of the layer, the whole row is fill
+      width = self.size[0]
+      left = min(max(origin[0], 0), width)
+      right = max(min(origin[0]+size[0], width), left)
+      before = array.array("h", [fill])*min(left-origin[0], size[0])
+      after = array.array("h", [fill])*(size[0]-len(before)-(right-left))
+      blankRow = array.array("h", [fill])*size[0]
+
+      #copy each row in, slicing rather than going tile by tile
+      region = array.array("h")
+      for y in range(origin[1], origin[1]+size[1]):
+         if 0 <= y < self.size[1]:
+            start = y*width
+            region.extend(before)
+            region.extend(self.array[start+left:start+right])
+            region.extend(after)
+         else:
+            region.extend(blankRow)
+      return region
+
+   def maskEqual(self, value):
+      """
+      Return a mask of which tiles equal a value, as a flat bytearray of 1s and 0s, row by row.
+
+      Animations are ignored.
+
+      value - the tile index to look for.
+      """
+
+      if numpy is not None:
+         return bytearray((numpy.frombuffer(self.array, dtype=numpy.int16) == value).astype(numpy.uint8).tostring())
+      return bytearray([t == value for t in self.array])
+
+   def findTiles(self, values):
+      """
+      Return a list of the positions of all tiles whose index is one of a set of values.
+
+      values - the tile indexes to look for.
+      """
+
+      #with numpy, find the matches in bulk
+      #otherwise scan the array once
+      width = self.size[0]
+      values = list(values)
+      if not values:
+         return []
+      if numpy is not None:
+         indexes = numpy.nonzero(numpy.in1d(numpy.frombuffer(self.array, dtype=numpy.int16), values))[0]
+      else:
+         values = set(values)
+         indexes = [i for i, t in enumerate(self.array) if t in values]
+      return [(int(i)%width, int(i)/width) for i in indexes]
 
    def tick(self):
       """
@@ -115,42 +277,51 @@ class Layer():
       if self.animations.has_key(position):
          t = self.animations[position].getFrame()
       else:
-         t = self.array[position[1]][position[0]]
+         t = self.array[(position[1]*self.size[0])+position[0]]
       return t
 
-class Tilemap(script_engine.ScriptableObject):
+class MapData():
    """
-   Class representing a map object.
+   Class holding the data of a map, without any pygame resources.
+
+   Create a blank MapData, then populate it by calling open(), openXML() or openBaked().
    """
-   
-   def __init__(self, fn):
+
+   def __init__(self):
+      """Create a blank map data object."""
+
+      self.fn = None
+
+   def open(self, fn):
       """
-      Open the map data file, set border tiles and connections, and add NPCs and other events.
+      Open the map from its baked binary file if there's an up to date one, otherwise from its XML.
 
       fn - the filename of the map XML file.
       """
 
-      #for the scripting engine
-      script_engine.ScriptableObject.__init__(self)
+      #try the baked file first, falling back to the XML if it's missing or stale
+      bakedPath = getBakedPath(fn)
+      if not (os.path.exists(bakedPath) and self.openBaked(fn, bakedPath)):
+         self.openXML(fn)
 
-      #store variables we'll need later
-      self.fn = fn
+   def openXML(self, fn):
+      """
+      Open the map XML file and the map data file it points to.
 
-      #get a script engine (singleton)
-      self.scriptEngine = script_engine.ScriptEngine()
+      fn - the filename of the map XML file.
+      """
 
       #parse the XML file
+      self.fn = fn
       root = data.getTreeRoot(fn)
-      self.music = os.path.join(settings.path, "data", data.getAttr(root, "music", data.D_STRING))
+      self.music = data.getAttr(root, "music", data.D_STRING)
+      self.mapFile = data.getAttr(root, "file", data.D_STRING)
+      self.tilesetFile = data.getAttr(root, "tileset", data.D_STRING)
 
       #open the actual map data file to create the map tile data
-      mapPath = os.path.join(settings.path, "data", data.getAttr(root, "file", data.D_STRING))
+      mapPath = os.path.join(settings.path, "data", self.mapFile)
       self.openMap(mapPath)
 
-      #create the tileset
-      tilesetPath = os.path.join(settings.path, "data", data.getAttr(root, "tileset", data.D_STRING))
-      self.tileset = tileset.Tileset(tilesetPath)
-
       #set the border tiles
       self.borderTiles = {}
       borderNode = data.getChild(root, "border")
@@ -160,54 +331,18 @@ class Tilemap(script_engine.ScriptableObject):
       self.borderTiles[BD_NE] = data.getAttr(borderNode, "ne", data.D_INT)-1
       self.borderTiles[BD_SW] = data.getAttr(borderNode, "sw", data.D_INT)-1
       self.borderTiles[BD_SE] = data.getAttr(borderNode, "se", data.D_INT)-1
-      
-      #create any connections from the map
-      #connected maps will not be loaded until the map becomes the main game map
-      #connections are stored as {direction: (filename, offset)}
-      self.connections = {}
-      self.connectedMaps = {}
-      for c in data.getChildren(root, "connection"):
-         side = data.getAttr(c, "side", data.D_STRING)
-         fp = os.path.join(settings.path, "data", data.getAttr(c, "map", data.D_STRING))
-         offset = data.getAttr(c, "offset", data.D_INT)
-         
-         if side == "left":
-            self.connections[sprite.DIR_LEFT] = (fp, offset)
-         elif side == "right":
-            self.connections[sprite.DIR_RIGHT] = (fp, offset)
-         elif side == "up":
-            self.connections[sprite.DIR_UP] = (fp, offset)
-         elif side == "down":
-            self.connections[sprite.DIR_DOWN] = (fp, offset)
 
-      #create any NPCs, adding them to the sprite dictionary
-      self.sprites = {}
-      for n in data.getChildren(root, "npc"):
-         spr = npc.NPC(n, self)
-         self.sprites[spr.id] = spr
-
-      #create a dictionary to hold positions reserved by moving sprites
-      self.reservedPositions = {}
-
-      #create script and warp events, adding them to the events dictionary
-      #if a load script is defined, create it
-      self.events = {}
-      loadScript = None
-      for s in data.getChildren(root, "script"):
-         trigger = data.getAttr(s, "trigger", data.D_STRING)
-         if trigger == "load":
-            loadScript = script_engine.Script(s)   
-         else:
-            position = tuple(data.getAttr(s, "position", data.D_INT2LIST)) 
-            self.events[position] = events.ScriptEvent(s, self)
-            
-      for w in root.findall("warp"):
-         position = tuple(data.getAttr(w, "position", data.D_INT2LIST))
-         self.events[position] = events.Warp(w, self)
+      #store any connections as (side, map file, offset)
+      self.connections = []
+      for c in data.getChildren(root, "connection"):
+         self.connections.append((data.getAttr(c, "side", data.D_STRING),
+                                  data.getAttr(c, "map", data.D_STRING),
+                                  data.getAttr(c, "offset", data.D_INT)))
 
-      #if there is a load script, run it
-      if loadScript is not None:
-         self.scriptEngine.run(loadScript, self)
+      #store the nodes needed to create NPCs, scripts and warps
+      self.npcNodes = data.getChildren(root, "npc")
+      self.scriptNodes = data.getChildren(root, "script")
+      self.warpNodes = data.getChildren(root, "warp")
 
    def openMap(self, fn):
       ext = os.path.splitext(fn)[1]
@@ -263,6 +398,189 @@ class Tilemap(script_engine.ScriptableObject):
       self.collisionLayer.offsetElements(collisionTilesetOffset)
       self.behaviourLayer.offsetElements(behaviourTilesetOffset)
 
+   def getSourceTimes(self):
+      """Return the modification times of the map XML file and its map data file."""
+
+      mapPath = os.path.join(settings.path, "data", self.mapFile)
+      return os.path.getmtime(self.fn), os.path.getmtime(mapPath)
+
+   def openBaked(self, fn, bakedPath):
+      """
+      Open a baked binary map file created by map_baker.
+
+      Returns False without changing anything if the file is out of date or not a baked map.
+
+      fn - the filename of the map XML file the baked file was made from.
+      bakedPath - the path to the baked file.
+      """
+
+      #read the whole file at once
+      try:
+         f = open(bakedPath, "rb")
+         raw = f.read()
+         f.close()
+      except IOError:
+         raise error.DIOError(fn, bakedPath)
+
+      #check the header, then unmarshal the metadata
+      headerSize = struct.calcsize(BAKED_HEADER)
+      if len(raw) < headerSize:
+         return False
+      magic, version, metaLength = struct.unpack_from(BAKED_HEADER, raw)
+      if magic != BAKED_MAGIC or version != BAKED_VERSION:
+         return False
+      try:
+         meta = marshal.loads(raw[headerSize:headerSize+metaLength])
+      except (ValueError, EOFError, TypeError):
+         return False
+
+      #make sure the source files haven't changed since it was baked
+      mapPath = os.path.join(settings.path, "data", meta["file"])
+      try:
+         if (os.path.getmtime(fn), os.path.getmtime(mapPath)) != tuple(meta["mtimes"]):
+            return False
+      except OSError:
+         return False
+
+      #make sure the file holds every plane in full, as a bake that was cut short would give short layers
+      #each plane is a 16 bit tile index per cell, with a plane per layer plus collision and behaviour
+      planeLength = meta["size"][0]*meta["size"][1]*2
+      if len(raw) != headerSize+metaLength+(planeLength*(len(meta["levels"])+2)):
+         return False
+
+      #store the map properties
+      self.fn = fn
+      self.music = meta["music"]
+      self.mapFile = meta["file"]
+      self.tilesetFile = meta["tileset"]
+      self.size = tuple(meta["size"])
+      self.borderTiles = {BD_NW: meta["border"][0],
+                          BD_NE: meta["border"][1],
+                          BD_SW: meta["border"][2],
+                          BD_SE: meta["border"][3]}
+      self.connections = [tuple(c) for c in meta["connections"]]
+      self.npcNodes = [buildNode(n, fn) for n in meta["npcs"]]
+      self.scriptNodes = [buildNode(n, fn) for n in meta["scripts"]]
+      self.warpNodes = [buildNode(n, fn) for n in meta["warps"]]
+
+      #cut the tile planes out of the rest of the file
+      #planes are stored little endian, one after the other, with the collision and behaviour planes last
+      pointer = headerSize+metaLength
+      planes = []
+      for i in range(0, len(meta["levels"])+2):
+         plane = array.array("h")
+         plane.fromstring(raw[pointer:pointer+planeLength])
+         if sys.byteorder == "big":
+            plane.byteswap()
+         planes.append(plane)
+         pointer += planeLength
+
+      #create the layers
+      self.layers = []
+      for level, plane in zip(meta["levels"], planes):
+         l = Layer()
+         l.openPlane(level, self.size, plane)
+         self.layers.append(l)
+      self.collisionLayer = Layer()
+      self.collisionLayer.openPlane(-1, self.size, planes[-2])
+      self.behaviourLayer = Layer()
+      self.behaviourLayer.openPlane(-2, self.size, planes[-1])
+
+      return True
+
+class Tilemap(script_engine.ScriptableObject):
+   """
+   Class representing a map object.
+   """
+   
+   def __init__(self, fn, mapData=None):
+      """
+      Open the map data file, set border tiles and connections, and add NPCs and other events.
+
+      fn - the filename of the map XML file.
+      mapData - an already opened MapData for the map, or None to open it now.
+      """
+
+      #for the scripting engine
+      script_engine.ScriptableObject.__init__(self)
+
+      #store variables we'll need later
+      self.fn = fn
+
+      #get a script engine (singleton)
+      self.scriptEngine = script_engine.ScriptEngine()
+
+      #open the map data, unless we've been given it
+      if mapData is None:
+         mapData = MapData()
+         mapData.open(fn)
+      self.music = os.path.join(settings.path, "data", mapData.music)
+
+      #take the map tile data
+      self.size = mapData.size
+      self.layers = mapData.layers
+      self.collisionLayer = mapData.collisionLayer
+      self.behaviourLayer = mapData.behaviourLayer
+
+      #create the tileset
+      tilesetPath = os.path.join(settings.path, "data", mapData.tilesetFile)
+      self.tileset = tileset.Tileset(tilesetPath)
+
+      #no pre-rendered chunks yet, the camera creates them when the map is first drawn
+      self.chunkCache = None
+
+      #set the border tiles
+      self.borderTiles = mapData.borderTiles
+      
+      #create any connections from the map
+      #connected maps will not be loaded until the map becomes the main game map
+      #connections are stored as {direction: (filename, offset)}
+      self.connections = {}
+      self.connectedMaps = {}
+      for side, mapFile, offset in mapData.connections:
+         fp = os.path.join(settings.path, "data", mapFile)
+         
+         if side == "left":
+            self.connections[sprite.DIR_LEFT] = (fp, offset)
+         elif side == "right":
+            self.connections[sprite.DIR_RIGHT] = (fp, offset)
+         elif side == "up":
+            self.connections[sprite.DIR_UP] = (fp, offset)
+         elif side == "down":
+            self.connections[sprite.DIR_DOWN] = (fp, offset)
+
+      #create any NPCs, adding them to the sprite dictionary
+      self.sprites = {}
+      for n in mapData.npcNodes:
+         spr = npc.NPC(n, self)
+         self.sprites[spr.id] = spr
+
+      #create a dictionary to hold positions reserved by moving sprites
+      self.reservedPositions = {}
+
+      #create script and warp events, adding them to the events dictionary
+      #if a load script is defined, create it
+      self.events = {}
+      loadScript = None
+      for s in mapData.scriptNodes:
+         trigger = data.getAttr(s, "trigger", data.D_STRING)
+         if trigger == "load":
+            loadScript = script_engine.Script(s)   
+         else:
+            position = tuple(data.getAttr(s, "position", data.D_INT2LIST)) 
+            self.events[position] = events.ScriptEvent(s, self)
+            
+      for w in mapData.warpNodes:
+         position = tuple(data.getAttr(w, "position", data.D_INT2LIST))
+         self.events[position] = events.Warp(w, self)
+
+      #all the map's scripts are compiled now, so write out any new compiled scripts at once
+      script_engine.flushCache()
+
+      #if there is a load script, run it
+      if loadScript is not None:
+         self.scriptEngine.run(loadScript, self)
+
    def getLayersOnLevel(self, i):
       """
       Return a list of layers on this map on a given level.
@@ -325,9 +643,38 @@ class Tilemap(script_engine.ScriptableObject):
       Called when the map becomes the main game map.
       """
 
-      #create each connecting map
+      #get each connecting map which isn't already loaded
       for direction, (fn, offset) in self.connections.items():
-         self.connectedMaps[direction] = (Tilemap(fn), offset)
+         if not self.connectedMaps.has_key(direction):
+            self.connectedMaps[direction] = (getMap(fn), offset)
+
+   def unload(self):
+      """
+      Release the map's shared resources.
+
+      Called when the map is no longer going to be used.
+      The player isn't unloaded, since it moves on to another map.
+      """
+
+      #release our tileset and those of our sprites
+      #the player moves between maps and lasts as long as the game, so keeps its tilesets
+      self.tileset.release()
+      for key in self.sprites:
+         if key != "PLAYER":
+            self.sprites[key].unload()
+
+      #drop the pre-rendered chunks
+      self.chunkCache = None
+
+   def getMemorySize(self):
+      """Return the approximate number of bytes the map is using, not counting shared tilesets."""
+
+      #count the tile planes, the pre-rendered chunks and the sprites
+      size = sum([len(l.array)*l.array.itemsize for l in self.layers + [self.collisionLayer, self.behaviourLayer]])
+      if self.chunkCache is not None:
+         size += self.chunkCache.getMemorySize()
+      size += len(self.sprites)*SPRITE_SIZE
+      return size
 
    def getCollisionData(self, position):
       """
@@ -338,7 +685,7 @@ class Tilemap(script_engine.ScriptableObject):
       
       #if it's on the map, simply return the collision data
       if (0 <= position[0] < self.size[0]) and (0 <= position[1] < self.size[1]):
-         return self.collisionLayer.array[position[1]][position[0]] #direct indexing prevents checking for animations
+         return self.collisionLayer.getTile(position) #prevents checking for animations
 
       #otherwise see if it's on a connecting map
       #if it is, get it
@@ -368,7 +715,7 @@ class Tilemap(script_engine.ScriptableObject):
       """
 
       if (0 <= position[0] < self.size[0]) and (0 <= position[1] < self.size[1]):
-         return self.behaviourLayer.array[position[1]][position[0]] #direct indexing prevents checking for animations
+         return self.behaviourLayer.getTile(position) #prevents checking for animations
 
       #otherwise see if it's on a connecting map
       #if it is, get it
@@ -425,13 +772,10 @@ class Tilemap(script_engine.ScriptableObject):
       if name == "tileset":
          return self.tileset
       else:
-         return self.getSpriteById(name)
-
-   def getVar(self, name):
-      raise KeyError
-
-   def setVar(self, name, value):
-      raise KeyError
+         try:
+            return self.getSpriteById(name)
+         except KeyError:
+            raise script_engine.DLookupError(name)
 
    def investigate(self, target, level):
       """
@@ -478,3 +822,47 @@ class Tilemap(script_engine.ScriptableObject):
       for key in self.connectedMaps:
          self.connectedMaps[key][0].tick()
 
+
+def unloadCachedMap(key, mMap):
+   """Unload a map evicted from the map cache."""
+
+   mMap.unload()
+
+#cache of recently visited maps which aren't currently in use, keyed by absolute path
+mapCache = data.ResourceCache(MAPCACHE_BUDGET, unloadCachedMap)
+
+def getMap(fn):
+   """
+   Get a map to use, reusing a recently visited one if there is one.
+
+   A reused map keeps the state it was left in, including its NPCs.
+   Otherwise the map is created, using its data if it's been prefetched.
+
+   fn - the filename of the map XML file.
+   """
+
+   #if the map's in the cache, take it out while it's in use
+   key = os.path.abspath(fn)
+   mMap = mapCache.get(key)
+   if mMap is not None:
+      mapCache.remove(key)
+      return mMap
+
+   #otherwise create it
+   return Tilemap(fn, map_prefetch.MapPrefetcher().take(fn))
+
+def releaseMap(mMap):
+   """
+   Finish using a map, keeping it in the map cache in case it's visited again.
+
+   mMap - the map to release.
+   """
+
+   #if there's already a copy of the map waiting in the cache, unload that one
+   key = os.path.abspath(mMap.fn)
+   old = mapCache.remove(key)
+   if (old is not None) and (old is not mMap):
+      old.unload()
+
+   #store the map, which may evict older maps if we're over budget
+   mapCache.put(key, mMap, mMap.getMemorySize())
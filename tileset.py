@@ -1,4 +1,5 @@
 import os
+import collections
 import xml.etree.ElementTree as ET
 
 import pygame
@@ -9,14 +10,21 @@ import error
 import globs
 import data
 
-class Tileset():
-   """Class representing a tileset from a tileset image"""
-   
+#number of tilesets no longer in use to keep loaded, in case they're needed again
+TILESETCACHE_IDLE = 16
+
+class TilesetData():
+   """
+   Class holding the data of a tileset which is shared by everything using it.
+
+   The tile surfaces and animation frame lists must not be modified.
+   """
+
    def __init__(self, fn):
       """
-      Open the tileset image, and set up animations.
+      Open the tileset image, and read the animation definitions.
 
-      fn - the path to the tileset image.
+      fn - the path to the tileset XML file.
       """
 
       #parse the XML file
@@ -28,20 +36,18 @@ class Tileset():
       tilesetPath = os.path.join(settings.path, "data", data.getAttr(root, "file", data.D_STRING))
       self.openImage(tilesetPath)
 
-      #create animations for the tileset
-      self.autoAnimations = {}
-      self.walkontoAnimations = {}
+      #read the frames of each animation, stored as {tile: frames}
+      self.autoFrames = {}
+      self.walkontoFrames = {}
       for anim in root.findall("animation"):
          trigger = data.getAttr(anim, "trigger", data.D_STRING)
          tile = data.getAttr(anim, "tile", data.D_INT)
          frames = data.getAttr(anim, "frames", data.D_INTLIST)
-         a = animation.Animation(frames)
          
          if trigger == "auto":
-            a.play(True)
-            self.autoAnimations[tile] = a
+            self.autoFrames[tile] = frames
          elif trigger == "walkonto":
-            self.walkontoAnimations[tile] = a
+            self.walkontoFrames[tile] = frames
 
    def openImage(self, fn):
       """
@@ -53,8 +59,7 @@ class Tileset():
       #get the image, and make sure it's pixel dimensions are consistent
       #tilesets have 1 spacing between each tile,
       #so adding 1 should give a multiple of the tilesize+1
-      tilesetImage = data.getImage(fn)
-      tilesetImage.set_colorkey(self.transparency)
+      tilesetImage = data.toDisplayFormat(data.getImage(fn))
       
       data.check(((tilesetImage.get_width()+1)%(self.tileSize[0]+1))==0, fn)
       data.check(((tilesetImage.get_height()+1)%(self.tileSize[1]+1))==0, fn)
@@ -62,17 +67,131 @@ class Tileset():
                     (tilesetImage.get_height()+1)/(self.tileSize[1]+1))
 
       #iterate over each tile, cutting it out and adding to our list
+      #each tile is converted to its own surface so it can be run length encoded separately
       #go across each row in turn to get index numbering correct
       self.tiles = []
       for y in range(0, dimensions[1]):
          for x in range(0, dimensions[0]):
             tile = tilesetImage.subsurface((x*(self.tileSize[0]+1), y*(self.tileSize[1]+1), self.tileSize[0], self.tileSize[1]))
-            self.tiles.append(tile)
+            self.tiles.append(data.toDisplayFormat(tile, self.transparency))
 
       #calculate offset
       self.tileOffset = ((globs.TILESIZE[0]-self.tileSize[0])/2,
                          globs.TILESIZE[1]-self.tileSize[1])
 
+class TilesetCache():
+   """
+   Reference counted cache of tileset data, keyed by path.
+
+   Borg singleton, so every instance shares the same cache.
+   Tilesets no longer in use are kept loaded until more than TILESETCACHE_IDLE of them build up.
+   """
+
+   #borg singleton
+   __shared_state = {"entries": {},
+                     "refs": {},
+                     "idle": collections.OrderedDict(),
+                     "hits": 0,
+                     "misses": 0}
+
+   def __init__(self):
+      """Get the shared state."""
+      
+      self.__dict__ = self.__shared_state
+
+   def acquire(self, fn):
+      """
+      Get the data for a tileset, loading it if needed, and add a reference to it.
+
+      fn - the path to the tileset XML file.
+      """
+
+      #if it's already loaded, take it out of the idle list if it's there
+      #otherwise load it
+      key = os.path.abspath(fn)
+      if self.entries.has_key(key):
+         self.hits += 1
+         if self.idle.has_key(key):
+            del(self.idle[key])
+      else:
+         self.misses += 1
+         self.entries[key] = TilesetData(fn)
+         self.refs[key] = 0
+
+      #add the reference
+      self.refs[key] += 1
+      return self.entries[key]
+
+   def release(self, fn):
+      """
+      Remove a reference to a tileset.
+
+      If nothing else is using it, it's kept idle in case it's needed again,
+      and the least recently used idle tilesets are dropped if there are too many.
+
+      fn - the path to the tileset XML file.
+      """
+
+      #remove the reference
+      key = os.path.abspath(fn)
+      self.refs[key] -= 1
+
+      #if it's no longer in use, make it idle and drop the oldest idle tilesets if there are too many
+      if self.refs[key] <= 0:
+         self.idle[key] = True
+         while len(self.idle) > TILESETCACHE_IDLE:
+            oldKey, value = self.idle.popitem(last=False)
+            del(self.entries[oldKey])
+            del(self.refs[oldKey])
+
+   def getStats(self):
+      """Return a dictionary of cache statistics."""
+
+      return {"loaded": len(self.entries),
+              "idle": len(self.idle),
+              "hits": self.hits,
+              "misses": self.misses}
+
+class Tileset():
+   """
+   Class representing a tileset from a tileset image.
+
+   The tiles are shared with anything else using the same tileset, but the animations are our own.
+   """
+   
+   def __init__(self, fn):
+      """
+      Get the tileset data from the cache, and set up animations.
+
+      fn - the path to the tileset XML file.
+      """
+
+      #get the shared data
+      self.fn = fn
+      self.shared = TilesetCache().acquire(fn)
+      self.released = False
+      self.tileSize = self.shared.tileSize
+      self.transparency = self.shared.transparency
+      self.tiles = self.shared.tiles
+      self.tileOffset = self.shared.tileOffset
+
+      #create our own animations for the tileset
+      self.autoAnimations = {}
+      self.walkontoAnimations = {}
+      for tile, frames in self.shared.autoFrames.items():
+         a = animation.Animation(frames)
+         a.play(True)
+         self.autoAnimations[tile] = a
+      for tile, frames in self.shared.walkontoFrames.items():
+         self.walkontoAnimations[tile] = animation.Animation(frames)
+
+   def release(self):
+      """Release the shared tileset data, when the tileset is no longer going to be used."""
+
+      if not self.released:
+         TilesetCache().release(self.fn)
+         self.released = True
+
    def tick(self):
       """Update the tileset one frame"""
 
@@ -0,0 +1,116 @@
+import os
+
+import pygame
+
+import settings
+import globs
+import data
+import font
+
+class BoxTiles():
+   """Class to hold the nine tiles a box is drawn from, cut from a box tileset."""
+
+   def __init__(self, fn):
+      """
+      Load the box tileset and cut out the tiles.
+
+      fn - the path to the box xml config file.
+      """
+
+      #parse the box xml file and load the tileset
+      root = data.getTreeRoot(fn)
+      tilesetPath = os.path.join(settings.path, "data", data.getAttr(root, "file", data.D_STRING))
+      transparency = data.getAttr(root, "transparency", data.D_INT3LIST)
+      tileset = data.getImage(tilesetPath, fn)
+      self.tileSize = data.getAttr(root, "tilesize", data.D_INT2LIST)
+      data.check((self.tileSize[0]+1)*3==tileset.get_width()+1, tilesetPath)
+      data.check((self.tileSize[1]+1)*3==tileset.get_height()+1, tilesetPath)
+
+      #cut each of the nine tiles out from the tileset, each as its own surface in the display format
+      #the tiles are separated by a pixel gap
+      def cut(x, y):
+         location = x*(self.tileSize[0]+1), y*(self.tileSize[1]+1)
+         return data.toDisplayFormat(tileset.subsurface(location, self.tileSize), transparency)
+      self.nw, self.n, self.ne = cut(0, 0), cut(1, 0), cut(2, 0)
+      self.w, self.c, self.e = cut(0, 1), cut(1, 1), cut(2, 1)
+      self.sw, self.s, self.se = cut(0, 2), cut(1, 2), cut(2, 2)
+
+class UIAssets():
+   """
+   Class to load the fonts, cursors and box tiles used by dialogs and menus once, and share them.
+
+   Assets are converted to the display format, so must not be drawn onto.
+   Once an asset is loaded, getting it again doesn't touch the disk.
+
+   Borg singleton, so every instance shares the same assets.
+   """
+
+   #borg singleton
+   __shared_state = {"assets": {}}
+
+   def __init__(self):
+      """Get the shared state."""
+
+      self.__dict__ = self.__shared_state
+
+   def getFont(self, fn=None):
+      """
+      Get a font.
+
+      fn - the path to the font XML file, or None for the game default font.
+      """
+
+      if fn is None:
+         fn = os.path.join(settings.path, "data", globs.FONT)
+      key = "font", os.path.abspath(fn)
+      try:
+         return self.assets[key]
+      except KeyError:
+         asset = self.assets[key] = font.Font(fn)
+         return asset
+
+   def getBoxTiles(self, fn=None):
+      """
+      Get the tiles to draw boxes from.
+
+      fn - the path to the box xml config file, or None for the game default box.
+      """
+
+      if fn is None:
+         fn = os.path.join(settings.path, "data", globs.DIALOG)
+      key = "box", os.path.abspath(fn)
+      try:
+         return self.assets[key]
+      except KeyError:
+         asset = self.assets[key] = BoxTiles(fn)
+         return asset
+
+   def getCursors(self, fn=None):
+      """
+      Get a dialog's cursors, as (continuation cursor, side cursor).
+
+      fn - the path to the dialog xml file, or None for the game default dialog.
+      """
+
+      if fn is None:
+         fn = os.path.join(settings.path, "data", globs.DIALOG)
+      key = "cursors", os.path.abspath(fn)
+      try:
+         return self.assets[key]
+      except KeyError:
+         pass
+
+      #load both cursors, with the dialog's transparency
+      root = data.getTreeRoot(fn)
+      transparency = data.getAttr(root, "transparency", data.D_INT3LIST)
+      cursors = []
+      for attribute in ("cursor", "sidecursor"):
+         cursorPath = os.path.join(settings.path, "data", data.getAttr(root, attribute, data.D_STRING))
+         cursors.append(data.toDisplayFormat(data.getImage(cursorPath, fn), transparency))
+      asset = self.assets[key] = tuple(cursors)
+      return asset
+
+   def clear(self):
+      """Forget all loaded assets, so they're loaded again when next needed."""
+
+      self.assets.clear()